@@ -1,12 +1,19 @@
+import itertools
 import streamlit as st
-from rag_engine import get_chat_response
+# With RETRIEVAL_SERVER set, retrieval runs in the shared retrieval_server.py
+# and this worker only streams the chat reply
+from rag_engine import stream_chat_response
+from utils.metrics import start_exporters
 
 st.set_page_config(page_title="University Chatbot", layout="wide")
+start_exporters()
 st.title("🎓 University Chatbot")
 
 query = st.text_input("Ask a question about the university")
 
 if query:
+    # Spinner until the first token, then the answer renders as it arrives
     with st.spinner("Thinking..."):
-        response = get_chat_response(query)
-        st.write(response)
+        stream = stream_chat_response(query)
+        first_piece = next(stream, "")
+    st.write_stream(itertools.chain([first_piece], stream))
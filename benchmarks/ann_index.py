@@ -0,0 +1,116 @@
+# Recall@k, query latency and memory of each index type against exact flat
+# search, on the knowledge base embeddings and on synthetic scaled-up corpora.
+#
+#   python -m benchmarks.ann_index --sizes data,20000,100000 --k 10
+#
+# "data" uses the university_data.json embeddings from the embedding cache
+# (filled by any earlier run of rag_engine); when they are not cached, a
+# synthetic corpus of the same size stands in.
+
+import time
+import argparse
+import statistics
+import numpy as np
+from utils import ann_index
+
+CONFIGS = [
+    ("flat", "ip"),
+    ("hnsw", "l2"),
+    ("hnsw", "ip"),
+    ("ivfpq", "l2"),
+    ("ivfpq", "ip"),
+]
+
+
+# Clustered unit vectors: topics with paraphrase-like spread around them
+def synthetic_corpus(size, dim, clusters=200, spread=0.6, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim), dtype="float32")
+    vectors = centers[rng.integers(0, clusters, size)]
+    vectors += spread * rng.standard_normal((size, dim), dtype="float32") * np.linalg.norm(centers[0]) / np.sqrt(dim)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+def data_corpus(data_path):
+    from rag_engine import EMBEDDING_MODEL, get_chunks
+    from utils.embedding_cache import get_embedding_cache
+    chunks = get_chunks(data_path)
+    vectors = get_embedding_cache(EMBEDDING_MODEL).get_many(chunks)
+    found = [v for v in vectors if v is not None]
+    if len(found) < len(chunks):
+        print(f"[WARN] Only {len(found)}/{len(chunks)} chunk embeddings cached; using a synthetic corpus.")
+        return None, len(chunks)
+    return np.array(found, dtype="float32"), len(chunks)
+
+# Queries near corpus points, like rephrased versions of stored questions
+def make_queries(corpus, count, noise=0.3, seed=1):
+    rng = np.random.default_rng(seed)
+    base = corpus[rng.integers(0, len(corpus), count)]
+    queries = base + noise * rng.standard_normal(base.shape, dtype="float32") / np.sqrt(corpus.shape[1])
+    return queries / np.linalg.norm(queries, axis=1, keepdims=True)
+
+def recall_at_k(found, truth):
+    k = truth.shape[1]
+    return float(np.mean([len(set(f) & set(t)) / k for f, t in zip(found, truth)]))
+
+def bench(kind, metric, corpus, queries, truth, k):
+    index = ann_index.make_index(corpus.shape[1], kind, metric, size=len(corpus))
+    started = time.perf_counter()
+    ann_index.add_vectors(index, corpus, np.arange(len(corpus)))
+    build = time.perf_counter() - started
+
+    single = []
+    for q in queries[:200]:
+        started = time.perf_counter()
+        ann_index.search(index, q[None, :], k)
+        single.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    _, found = ann_index.search(index, queries, k)
+    batch = time.perf_counter() - started
+
+    return {
+        "build_s": build,
+        "mem_mb": ann_index.index_bytes(index) / 2**20,
+        "p50_ms": statistics.median(single) * 1000,
+        "qps": len(queries) / batch,
+        "recall": recall_at_k(found, truth[metric]),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ANN index types against exact search")
+    parser.add_argument("--data", default="data/university_data.json")
+    parser.add_argument("--sizes", default="data,20000")
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    for size in args.sizes.split(","):
+        label = size
+        if size == "data":
+            corpus, count = data_corpus(args.data)
+            if corpus is None:
+                corpus, label = synthetic_corpus(count, args.dim), f"data~{count}"
+        else:
+            corpus = synthetic_corpus(int(size), args.dim)
+        queries = make_queries(corpus, args.queries)
+
+        # Exact neighbours for both metrics from the flat baselines
+        truth, results = {}, {}
+        for metric in ("l2", "ip"):
+            exact = ann_index.make_index(corpus.shape[1], "flat", metric)
+            ann_index.add_vectors(exact, corpus, np.arange(len(corpus)))
+            truth[metric] = ann_index.search(exact, queries, args.k)[1]
+        results[("flat", "l2")] = bench("flat", "l2", corpus, queries, truth, args.k)
+        for kind, metric in CONFIGS:
+            results[(kind, metric)] = bench(kind, metric, corpus, queries, truth, args.k)
+
+        print(f"\n{label} vectors x {corpus.shape[1]} dims, {len(queries)} queries, recall@{args.k}")
+        print(f"{'index':<12} {'recall':>7} {'p50 ms':>8} {'batch q/s':>10} {'build s':>8} {'MB':>8}")
+        for (kind, metric), r in results.items():
+            print(f"{kind + '/' + metric:<12} {r['recall']:>7.3f} {r['p50_ms']:>8.3f} {r['qps']:>10.0f} "
+                  f"{r['build_s']:>8.2f} {r['mem_mb']:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
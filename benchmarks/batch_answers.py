@@ -0,0 +1,70 @@
+# Sequential get_chat_response vs answer_many for a batch of questions taken
+# from the knowledge base, against the local stand-in server. Runs in a
+# scratch directory so the tracked FAISS index is left alone.
+#
+#   python -m benchmarks.batch_answers --questions 100 --ttft 0.2
+
+import os
+import json
+import time
+import random
+import argparse
+import tempfile
+from benchmarks.fake_openai_server import FakeOpenAIServer
+
+
+def load_questions(path, count, seed=0):
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    questions = sorted({item["question"] for item in data if item.get("question")})
+    random.Random(seed).shuffle(questions)
+    return questions[:count]
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batched question answering")
+    parser.add_argument("--data", default="data/university_data.json")
+    parser.add_argument("--questions", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per embeddings request")
+    parser.add_argument("--ttft", type=float, default=0.2, help="seconds per chat request")
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    questions = load_questions(args.data, args.questions)
+    data_path = os.path.abspath(args.data)
+    os.chdir(tempfile.mkdtemp(prefix="batch_answers_"))
+    os.makedirs("data")
+    os.symlink(data_path, "data/university_data.json")
+
+    server = FakeOpenAIServer(latency=args.latency, ttft=args.ttft, reply_tokens=20).start_background()
+    os.environ["OPENAI_BASE_URL"] = server.base_url
+
+    import rag_engine
+    rag_engine.get_retriever()
+
+    # Each mode starts from cold query caches
+    def reset_caches():
+        for cache in (rag_engine.query_embedding_cache, rag_engine.search_cache, rag_engine.answer_cache):
+            cache.clear()
+
+    reset_caches()
+    before = server.requests
+    started = time.perf_counter()
+    sequential = [rag_engine.get_chat_response(q) for q in questions]
+    seq_time, seq_requests = time.perf_counter() - started, server.requests - before
+
+    reset_caches()
+    before = server.requests
+    started = time.perf_counter()
+    batched = rag_engine.answer_many_sync(questions, args.concurrency)
+    batch_time, batch_requests = time.perf_counter() - started, server.requests - before
+
+    assert sequential == batched, "batched answers differ from sequential ones"
+    print(f"{'mode':<12} {'seconds':>8} {'q/s':>7} {'requests':>9}")
+    print(f"{'sequential':<12} {seq_time:>8.2f} {len(questions) / seq_time:>7.1f} {seq_requests:>9}")
+    print(f"{'answer_many':<12} {batch_time:>8.2f} {len(questions) / batch_time:>7.1f} {batch_requests:>9}")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+# Time to first visible text: one blocking chat completion vs a streamed one,
+# against the local stand-in server.
+#
+#   python -m benchmarks.chat_streaming --ttft 0.3 --token-latency 0.02 --runs 5
+
+import os
+import time
+import argparse
+import statistics
+from benchmarks.fake_openai_server import FakeOpenAIServer
+
+MESSAGES = [{"role": "user", "content": "What are the admission requirements for Computer Science?"}]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark streamed vs blocking chat replies")
+    parser.add_argument("--ttft", type=float, default=0.3)
+    parser.add_argument("--token-latency", type=float, default=0.02)
+    parser.add_argument("--reply-tokens", type=int, default=120)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    server = FakeOpenAIServer(ttft=args.ttft, token_latency=args.token_latency,
+                              reply_tokens=args.reply_tokens).start_background()
+    os.environ["OPENAI_BASE_URL"] = server.base_url
+
+    from utils.embeddings import get_client
+    from utils.llm import stream_chat, stream_metrics
+
+    blocking = []
+    for _ in range(args.runs):
+        started = time.perf_counter()
+        get_client().chat.completions.create(model="fake", messages=MESSAGES)
+        blocking.append(time.perf_counter() - started)
+
+    first_pieces, totals = [], []
+    for _ in range(args.runs):
+        started = time.perf_counter()
+        first = None
+        for _piece in stream_chat(MESSAGES, model="fake"):
+            if first is None:
+                first = time.perf_counter() - started
+        first_pieces.append(first)
+        totals.append(time.perf_counter() - started)
+
+    summary = stream_metrics.summary()
+    print(f"{'mode':<10} {'first text ms':>14} {'total ms':>9}")
+    print(f"{'blocking':<10} {statistics.median(blocking) * 1000:>14.1f} {statistics.median(blocking) * 1000:>9.1f}")
+    print(f"{'stream':<10} {statistics.median(first_pieces) * 1000:>14.1f} {statistics.median(totals) * 1000:>9.1f}")
+    print(f"[INFO] stream metrics: ttft p50 {summary['ttft_p50_ms']:.1f} ms, "
+          f"{summary['tokens_per_sec']:.1f} tokens/s over {summary['streams']} streams")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
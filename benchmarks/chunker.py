@@ -0,0 +1,90 @@
+# Peak memory and time to chunk a large knowledge base: the old json.load
+# loader vs the streaming chunker, reading a JSON array or JSONL, keeping
+# the chunk texts or only passing through them (as an embedding pipeline
+# does). The corpus is the bundled data repeated with varied questions until
+# it reaches --mb. Each case runs in a fresh interpreter; peak memory is VmHWM.
+#
+#   python -m benchmarks.chunker --mb 200
+
+import os
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+
+MEASURE = """
+import json, time
+started = time.perf_counter()
+{code}
+elapsed = time.perf_counter() - started
+with open("/proc/self/status") as f:
+    peak = next(int(line.split()[1]) / 1024 for line in f if line.startswith("VmHWM"))
+print(json.dumps({{"seconds": elapsed, "peak_mb": peak, "chunks": n}}))
+"""
+
+CASES = {
+    "json.load (before)": """
+with open({json_path!r}, encoding="utf-8") as f:
+    data = json.load(f)
+chunks = [f"Q: {{e['question'].strip()}}\\nA: {{e['answer'].strip()}}" for e in data
+          if e.get("question", "").strip() and e.get("answer", "").strip()]
+n = len(chunks)
+""",
+    "stream json, keep texts": """
+from utils.chunker import iter_chunks
+chunks = [c.text for c in iter_chunks({json_path!r})]
+n = len(chunks)
+""",
+    "stream jsonl, keep texts": """
+from utils.chunker import iter_chunks
+chunks = [c.text for c in iter_chunks({jsonl_path!r})]
+n = len(chunks)
+""",
+    "stream json, pass through": """
+from utils.chunker import iter_chunks
+n = sum(1 for _ in iter_chunks({json_path!r}))
+""",
+}
+
+
+def write_corpus(data_path, target_mb, workdir):
+    with open(data_path, "r", encoding="utf-8") as f:
+        records = json.load(f)
+    json_path = os.path.join(workdir, "corpus.json")
+    jsonl_path = os.path.join(workdir, "corpus.jsonl")
+    copy = 0
+    with open(json_path, "w", encoding="utf-8") as fj, open(jsonl_path, "w", encoding="utf-8") as fl:
+        fj.write("[")
+        first = True
+        while fj.tell() < target_mb * 2**20:
+            for record in records:
+                record = dict(record, question=f"{record.get('question', '')} ({copy})")
+                line = json.dumps(record, ensure_ascii=False)
+                fj.write(("" if first else ",\n") + line)
+                fl.write(line + "\n")
+                first = False
+            copy += 1
+        fj.write("]")
+    return json_path, jsonl_path
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the streaming chunker")
+    parser.add_argument("--data", default="data/university_data.json")
+    parser.add_argument("--mb", type=float, default=100)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="chunker_")
+    json_path, jsonl_path = write_corpus(args.data, args.mb, workdir)
+    print(f"corpus {os.path.getsize(json_path) / 2**20:.0f} MB")
+    print(f"{'loader':<28} {'chunks':>9} {'seconds':>8} {'peak MB':>8}")
+    for name, code in CASES.items():
+        script = MEASURE.format(code=code.format(json_path=json_path, jsonl_path=jsonl_path))
+        out = subprocess.run([sys.executable, "-c", script], env=dict(os.environ, PYTHONPATH=os.getcwd()),
+                             capture_output=True, text=True, check=True)
+        result = json.loads(out.stdout.strip().splitlines()[-1])
+        print(f"{name:<28} {result['chunks']:>9} {result['seconds']:>8.2f} {result['peak_mb']:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
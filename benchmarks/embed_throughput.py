@@ -0,0 +1,49 @@
+# Throughput of the bulk embedding pipeline against the local stand-in server.
+#
+#   python -m benchmarks.embed_throughput --latency 0.05 --rate-limit-prob 0.05
+
+import os
+import time
+import argparse
+from benchmarks.fake_openai_server import FakeOpenAIServer
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batched embedding throughput")
+    parser.add_argument("--data", default="data/university_data.json")
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--latency-per-item", type=float, default=0.0005)
+    parser.add_argument("--rate-limit-prob", type=float, default=0.0)
+    parser.add_argument("--batch-sizes", default="1,32,100,256")
+    parser.add_argument("--workers", default="1,4,8")
+    args = parser.parse_args()
+
+    server = FakeOpenAIServer(latency=args.latency, latency_per_item=args.latency_per_item,
+                              rate_limit_prob=args.rate_limit_prob).start_background()
+    os.environ["OPENAI_BASE_URL"] = server.base_url
+
+    from utils.chunker import load_json_chunks
+    from utils.embeddings import embed_texts
+
+    chunks = load_json_chunks(args.data)
+    print(f"[INFO] {len(chunks)} chunks, server at {server.base_url}")
+    print(f"{'batch':>6} {'workers':>8} {'seconds':>9} {'texts/s':>9} {'requests':>9} {'failed':>7}")
+
+    for batch_size in [int(b) for b in args.batch_sizes.split(",")]:
+        for workers in [int(w) for w in args.workers.split(",")]:
+            # Serial single-text requests are slow; one pass is enough to compare
+            if batch_size == 1 and workers > 1:
+                continue
+            before = server.requests
+            started = time.perf_counter()
+            vectors = embed_texts(chunks, "fake", batch_size=batch_size, max_workers=workers)
+            elapsed = time.perf_counter() - started
+            failed = sum(v is None for v in vectors)
+            print(f"{batch_size:>6} {workers:>8} {elapsed:>9.2f} {len(chunks) / elapsed:>9.1f} "
+                  f"{server.requests - before:>9} {failed:>7}")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+# Local stand-in for the OpenAI HTTP API, used by the benchmarks.
+#
+#   python -m benchmarks.fake_openai_server --port 8765 --latency 0.05
+#   OPENAI_BASE_URL=http://127.0.0.1:8765/v1 streamlit run app.py
+#
+# Embeddings are deterministic per text so repeated runs are comparable.
+# Chat completions echo the question back word by word; with "stream": true
+# they arrive as server-sent events, --ttft and --token-latency apart.
+
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def fake_embedding(text, dim):
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "big")
+    rng = random.Random(seed)
+    vec = [rng.gauss(0.0, 1.0) for _ in range(dim)]
+    norm = sum(v * v for v in vec) ** 0.5 or 1.0
+    return [v / norm for v in vec]
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def do_POST(self):
+        server = self.server
+        payload = self._read_json()
+        server.count_request()
+
+        if random.random() < server.rate_limit_prob:
+            self._send_json(429, {"error": {"message": "Rate limit reached", "type": "requests"}},
+                            headers={"retry-after": str(server.retry_after)})
+            return
+
+        if self.path.endswith("/embeddings"):
+            self._handle_embeddings(payload)
+        elif self.path.endswith("/chat/completions"):
+            self._handle_chat(payload)
+        else:
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+    def _handle_embeddings(self, payload):
+        inputs = payload.get("input", [])
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        time.sleep(self.server.latency + self.server.latency_per_item * len(inputs))
+        data = [{"object": "embedding", "index": i, "embedding": fake_embedding(text, self.server.dim)}
+                for i, text in enumerate(inputs)]
+        self._send_json(200, {
+            "object": "list",
+            "data": data,
+            "model": payload.get("model", "fake"),
+            "usage": {"prompt_tokens": 0, "total_tokens": 0},
+        })
+
+    def _handle_chat(self, payload):
+        server = self.server
+        model = payload.get("model", "fake")
+        tokens = fake_reply_tokens(payload.get("messages", []), server.reply_tokens)
+        if not payload.get("stream"):
+            time.sleep(server.ttft + server.token_latency * len(tokens))
+            self._send_json(200, {
+                "id": "chatcmpl-fake",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": "".join(tokens)}}],
+                "usage": {"prompt_tokens": 0, "completion_tokens": len(tokens), "total_tokens": len(tokens)},
+            })
+            return
+
+        # Streamed reply: chunked transfer encoding, one SSE event per token
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        time.sleep(server.ttft)
+        deltas = [{"role": "assistant", "content": ""}] + [{"content": t} for t in tokens]
+        for i, delta in enumerate(deltas):
+            if i > 1:
+                time.sleep(server.token_latency)
+            self._send_event(chat_chunk(model, delta))
+        self._send_event(chat_chunk(model, {}, finish_reason="stop"))
+        self._send_chunk(b"data: [DONE]\n\n")
+        self._send_chunk(b"")
+
+    def _send_event(self, payload):
+        self._send_chunk(b"data: " + json.dumps(payload).encode("utf-8") + b"\n\n")
+
+    def _send_chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+
+def fake_reply_tokens(messages, count):
+    question = messages[-1].get("content", "") if messages else ""
+    words = ("Simulated answer: " + " ".join(question.split())).split(" ")
+    words = (words * (count // max(len(words), 1) + 1))[:count]
+    return [w if i == 0 else " " + w for i, w in enumerate(words)]
+
+def chat_chunk(model, delta, finish_reason=None):
+    return {
+        "id": "chatcmpl-fake",
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+
+
+class FakeOpenAIServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, host="127.0.0.1", port=0, dim=1536, latency=0.0,
+                 latency_per_item=0.0, rate_limit_prob=0.0, retry_after=0.05,
+                 ttft=0.0, token_latency=0.0, reply_tokens=40):
+        super().__init__((host, port), FakeOpenAIHandler)
+        self.dim = dim
+        self.latency = latency
+        self.latency_per_item = latency_per_item
+        self.rate_limit_prob = rate_limit_prob
+        self.retry_after = retry_after
+        self.ttft = ttft
+        self.token_latency = token_latency
+        self.reply_tokens = reply_tokens
+        self.requests = 0
+        self._count_lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def count_request(self):
+        with self._count_lock:
+            self.requests += 1
+
+    def start_background(self):
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return self
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the OpenAI API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added per request")
+    parser.add_argument("--latency-per-item", type=float, default=0.0, help="seconds added per input text")
+    parser.add_argument("--rate-limit-prob", type=float, default=0.0, help="chance of answering 429")
+    parser.add_argument("--ttft", type=float, default=0.0, help="seconds before the first chat token")
+    parser.add_argument("--token-latency", type=float, default=0.0, help="seconds between chat tokens")
+    parser.add_argument("--reply-tokens", type=int, default=40, help="tokens per chat reply")
+    args = parser.parse_args()
+
+    server = FakeOpenAIServer(args.host, args.port, args.dim, args.latency,
+                              args.latency_per_item, args.rate_limit_prob,
+                              ttft=args.ttft, token_latency=args.token_latency,
+                              reply_tokens=args.reply_tokens)
+    print(f"[INFO] Fake OpenAI API listening on {server.base_url}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
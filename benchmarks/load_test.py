@@ -0,0 +1,343 @@
+# Load test and regression check for the three retrieval paths. Builds a
+# seeded query workload from the knowledge base (verbatim questions,
+# paraphrases, typos and abbreviations such as "siwes" / "dept"), replays
+# it against rag_engine, rags and university_chatbot, each in a fresh
+# interpreter in a scratch directory, with embeddings and GPT fallbacks
+# served by the local stand-in server. Reports throughput, latency
+# percentiles and memory per target; --save keeps the numbers under
+# benchmarks/baselines/<commit>.json and --compare checks a run against one.
+#
+#   python -m benchmarks.load_test --queries 400 --save
+#   python -m benchmarks.load_test --compare HEAD~1 --tolerance 0.2
+#
+# Targets whose dependencies are not installed (sentence-transformers,
+# streamlit, textblob) are reported as skipped.
+
+import os
+import re
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import subprocess
+from benchmarks.fake_openai_server import FakeOpenAIServer
+from utils.lexicon import ABBREVIATIONS, CHAT_ABBREVIATIONS
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+KINDS = ("verbatim", "paraphrase", "typo", "abbreviation")
+
+
+# --- Workload ---
+PARAPHRASES = (
+    "can you tell me {q}",
+    "please {q}",
+    "i want to know {q}",
+    "{q} thanks",
+    "quick question: {q}",
+)
+QUESTION_LEAD_RE = re.compile(r"^(what|who|where)\s+(is|are)\s+", re.IGNORECASE)
+
+# full phrase -> shorthand, longest phrases first, from the same tables the
+# apps expand; single letters and upper-case course prefixes are left out
+def _shorthands():
+    pairs = {}
+    for table in (CHAT_ABBREVIATIONS, ABBREVIATIONS):
+        for short, full in table.items():
+            if len(short) > 1 and short.islower() and short.isalnum():
+                pairs.setdefault(full.lower(), short)
+    return sorted(pairs.items(), key=lambda pair: -len(pair[0]))
+
+SHORTHANDS = _shorthands()
+SHORTHAND_RE = re.compile(r"\b(" + "|".join(re.escape(full) for full, _ in SHORTHANDS) + r")\b", re.IGNORECASE)
+SHORTHAND_FOR = dict(SHORTHANDS)
+
+# "What is X?" becomes "tell me about X", anything else gets a template
+def paraphrase(question, rng):
+    body = question.rstrip("?").strip()
+    if rng.random() < 0.5 and QUESTION_LEAD_RE.match(body):
+        return "tell me about " + QUESTION_LEAD_RE.sub("", body, count=1)
+    return rng.choice(PARAPHRASES).format(q=body[0].lower() + body[1:])
+
+def _typo(word, rng):
+    i = rng.randrange(1, len(word) - 1)
+    edit = rng.choice(("swap", "drop", "double"))
+    if edit == "swap":
+        return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+    if edit == "drop":
+        return word[:i] + word[i + 1:]
+    return word[:i] + word[i] + word[i:]
+
+# One or two edits in lower-case words of four letters or more, so course
+# codes and numbers stay intact
+def typo(question, rng):
+    words = question.split()
+    candidates = [i for i, w in enumerate(words) if len(w) >= 4 and w.isalpha() and w.islower()]
+    for i in rng.sample(candidates, min(len(candidates), rng.choice((1, 2)))):
+        words[i] = _typo(words[i], rng)
+    return " ".join(words)
+
+def abbreviate(question, rng):
+    text = SHORTHAND_RE.sub(lambda m: SHORTHAND_FOR[m.group(0).lower()], question)
+    if text == question:
+        text = "pls " + question[0].lower() + question[1:]
+    return text.lower() if rng.random() < 0.5 else text
+
+VARIANTS = {
+    "verbatim": lambda question, rng: question,
+    "paraphrase": paraphrase,
+    "typo": typo,
+    "abbreviation": abbreviate,
+}
+
+def load_questions(path):
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return sorted({item["question"].strip() for item in data if item.get("question", "").strip()})
+
+# [(kind, query)], the same for a given data file, size and seed
+def build_workload(path, size, seed=0):
+    rng = random.Random(seed)
+    questions = load_questions(path)
+    return [(kind, VARIANTS[kind](rng.choice(questions), rng))
+            for kind in (KINDS[i % len(KINDS)] for i in range(size))]
+
+
+# --- Targets ---
+# Each target script defines setup() and query(text), runs in a scratch
+# directory holding the data files, and prints one JSON line of results.
+TARGETS = {
+    "rag_engine.search": """
+import rag_engine
+def setup():
+    global retriever
+    retriever = rag_engine.get_retriever()
+def query(text):
+    retriever.search(text, rag_engine.CONTEXT_CANDIDATES)
+""",
+    "rag_engine.answer": """
+import rag_engine
+def setup():
+    rag_engine.get_retriever()
+def query(text):
+    rag_engine.get_chat_response(text)
+""",
+    "rags.find_response": """
+import rags
+def setup():
+    global dataset, embeddings
+    dataset = rags.load_data()
+    embeddings, _ = rags.load_search_index()
+    rags.load_sparse_index()
+    # Course-code hits are answered directly even above any threshold
+    result = rags.retrieve_response("CSC 201", dataset, embeddings, threshold=1.5)
+    assert result["reply"] is not None, result
+def query(text):
+    rags.find_response(text, dataset, embeddings)
+""",
+    "university_chatbot.search_answer": """
+import university_chatbot
+def setup():
+    university_chatbot.get_index()
+    university_chatbot.get_spell_corrector()
+def query(text):
+    if university_chatbot.search_answer(text) is None:
+        university_chatbot.fallback_gpt(text)
+""",
+}
+
+RUNNER = """
+import sys, json, time
+from concurrent.futures import ThreadPoolExecutor
+def memory_mb():
+    fields = {{}}
+    with open("/proc/self/status") as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            if key in ("RssAnon", "VmHWM"):
+                fields[key] = int(value.split()[0]) / 1024
+    return fields
+try:
+{target}
+except ImportError as e:
+    print(json.dumps({{"skipped": str(e)}}))
+    sys.exit(0)
+with open({workload!r}, encoding="utf-8") as f:
+    workload = json.load(f)
+started = time.perf_counter()
+setup()
+startup = time.perf_counter() - started
+def timed(item):
+    t = time.perf_counter()
+    query(item[1])
+    return item[0], time.perf_counter() - t
+started = time.perf_counter()
+with ThreadPoolExecutor({concurrency}) as pool:
+    timings = list(pool.map(timed, workload))
+wall = time.perf_counter() - started
+memory = memory_mb()
+from utils.metrics import snapshot
+rates = snapshot()["rates"]
+print(json.dumps({{"startup_s": startup, "wall_s": wall, "timings": timings,
+                  "rss_anon_mb": memory.get("RssAnon"), "peak_rss_mb": memory.get("VmHWM"),
+                  "fallback_rate": next((v for k, v in rates.items() if k.endswith(".fallback_rate")), None)}}))
+"""
+
+
+def scratch_dir(data_path, dictionary_path):
+    path = tempfile.mkdtemp(prefix="load_test_")
+    os.makedirs(os.path.join(path, "data"))
+    os.symlink(data_path, os.path.join(path, "data", "university_data.json"))
+    # rags.py and university_chatbot.py read the same records as qa_dataset.json
+    os.symlink(data_path, os.path.join(path, "qa_dataset.json"))
+    if os.path.exists(dictionary_path):
+        os.symlink(dictionary_path, os.path.join(path, os.path.basename(dictionary_path)))
+    return path
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * q))]
+
+def summarize(result):
+    timings = sorted(t for _, t in result["timings"])
+    by_kind = {}
+    for kind, t in result["timings"]:
+        by_kind.setdefault(kind, []).append(t)
+    return {
+        "queries": len(timings),
+        "qps": len(timings) / result["wall_s"],
+        "p50_ms": percentile(timings, 0.50) * 1000,
+        "p95_ms": percentile(timings, 0.95) * 1000,
+        "p99_ms": percentile(timings, 0.99) * 1000,
+        "kind_p50_ms": {kind: percentile(sorted(ts), 0.50) * 1000 for kind, ts in sorted(by_kind.items())},
+        "startup_s": result["startup_s"],
+        "rss_anon_mb": result["rss_anon_mb"],
+        "peak_rss_mb": result["peak_rss_mb"],
+        # Share of queries answered by a GPT fallback (rags, university_chatbot)
+        "fallback_rate": result.get("fallback_rate"),
+    }
+
+def run_target(name, workload_path, env, cwd, concurrency):
+    target = "\n".join("    " + line for line in TARGETS[name].strip().splitlines())
+    code = RUNNER.format(target=target, workload=workload_path, concurrency=concurrency)
+    # Metrics on, for the fallback counters
+    env = dict(os.environ, PYTHONPATH=os.getcwd(), METRICS_ENABLED="1", **env)
+    out = subprocess.run([sys.executable, "-c", code], env=env, cwd=cwd, capture_output=True, text=True)
+    if out.returncode != 0:
+        return {"error": (out.stderr.strip().splitlines() or ["exit code %d" % out.returncode])[-1]}
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+    return result if "skipped" in result else summarize(result)
+
+
+# --- Baselines ---
+def git_revision(rev="HEAD"):
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", rev], capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+def baseline_path(name):
+    if name.endswith(".json"):
+        return name
+    return os.path.join(BASELINE_DIR, f"{git_revision(name) or name}.json")
+
+def save_baseline(report):
+    os.makedirs(BASELINE_DIR, exist_ok=True)
+    path = os.path.join(BASELINE_DIR, f"{report['revision'] or 'unversioned'}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"[INFO] Baseline saved to {path}")
+
+# Slower p95 or lower throughput than the baseline by more than tolerance
+def regressions(report, baseline, tolerance):
+    found = []
+    for name, now in report["targets"].items():
+        before = baseline.get("targets", {}).get(name, {})
+        if "qps" not in now or "qps" not in before:
+            continue
+        if now["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            found.append(f"{name}: p95 {before['p95_ms']:.1f} -> {now['p95_ms']:.1f} ms")
+        if now["qps"] < before["qps"] * (1 - tolerance):
+            found.append(f"{name}: qps {before['qps']:.1f} -> {now['qps']:.1f}")
+    return found
+
+
+def _percent(rate):
+    return "-" if rate is None else f"{rate:.1%}"
+
+def print_report(report, baseline=None):
+    print(f"{report['queries']} queries ({', '.join(KINDS)}), concurrency {report['concurrency']}")
+    print(f"{'target':<34} {'qps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'startup':>8} {'rss MB':>7} {'peak MB':>8} {'fallback':>9}")
+    for name, stats in report["targets"].items():
+        if "qps" not in stats:
+            print(f"{name:<34} {'skipped: ' + stats.get('skipped', stats.get('error', '')):<60}")
+            continue
+        print(f"{name:<34} {stats['qps']:>8.1f} {stats['p50_ms']:>8.2f} {stats['p95_ms']:>8.2f} "
+              f"{stats['p99_ms']:>8.2f} {stats['startup_s']:>8.2f} {stats['rss_anon_mb']:>7.0f} "
+              f"{stats['peak_rss_mb']:>8.0f} {_percent(stats.get('fallback_rate')):>9}")
+        before = (baseline or {}).get("targets", {}).get(name, {})
+        if "qps" in before:
+            print(f"{'  vs ' + (baseline.get('revision') or 'baseline'):<34} {before['qps']:>8.1f} "
+                  f"{before['p50_ms']:>8.2f} {before['p95_ms']:>8.2f} {before['p99_ms']:>8.2f}")
+    print("\nMedian latency by query kind (ms)")
+    print(f"{'target':<34} " + " ".join(f"{kind:>12}" for kind in KINDS))
+    for name, stats in report["targets"].items():
+        if "kind_p50_ms" in stats:
+            print(f"{name:<34} " + " ".join(f"{stats['kind_p50_ms'].get(kind, 0):>12.2f}" for kind in KINDS))
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the retrieval paths and compare against a baseline")
+    parser.add_argument("--data", default="data/university_data.json")
+    parser.add_argument("--dictionary", default="frequency_dictionary_en_82_765.txt")
+    parser.add_argument("--queries", type=int, default=400)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--targets", default=",".join(TARGETS))
+    parser.add_argument("--latency", type=float, default=0.02, help="stand-in server seconds per request")
+    parser.add_argument("--save", action="store_true", help="store this run as the baseline for HEAD")
+    parser.add_argument("--compare", help="commit or baseline .json file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative slowdown")
+    args = parser.parse_args()
+
+    data_path = os.path.abspath(args.data)
+    workload = build_workload(data_path, args.queries, args.seed)
+    workload_path = os.path.join(tempfile.mkdtemp(prefix="load_test_"), "workload.json")
+    with open(workload_path, "w", encoding="utf-8") as f:
+        json.dump(workload, f)
+
+    server = FakeOpenAIServer(latency=args.latency, ttft=args.latency, reply_tokens=20).start_background()
+    env = {"OPENAI_BASE_URL": server.base_url, "OPENAI_API_KEY": "load-test"}
+    report = {
+        "revision": git_revision(),
+        "time": time.time(),
+        "queries": len(workload),
+        "seed": args.seed,
+        "concurrency": args.concurrency,
+        "latency": args.latency,
+        "targets": {},
+    }
+    for name in args.targets.split(","):
+        cwd = scratch_dir(data_path, os.path.abspath(args.dictionary))
+        report["targets"][name] = run_target(name, workload_path, env, cwd, args.concurrency)
+    server.shutdown()
+
+    baseline = None
+    if args.compare:
+        with open(baseline_path(args.compare), "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+    if args.save:
+        save_baseline(report)
+    if baseline is not None:
+        found = regressions(report, baseline, args.tolerance)
+        for line in found:
+            print(f"[WARN] Regression {line}")
+        if found:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
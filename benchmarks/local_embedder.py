@@ -0,0 +1,96 @@
+# End-to-end retrieval latency in rag_engine with the remote embedder
+# (local stand-in server with a simulated network round trip) vs the local
+# all-MiniLM-L6-v2 embedder at several CPU thread counts, plus bulk encoding
+# throughput per batch size. Each configuration runs in a fresh interpreter
+# in a scratch directory, so caches and the tracked index are untouched.
+#
+#   python -m benchmarks.local_embedder --rtt 0.15 --threads 1,2,4 --queries 100
+
+import os
+import sys
+import json
+import argparse
+import tempfile
+import statistics
+import subprocess
+from benchmarks.fake_openai_server import FakeOpenAIServer
+
+RETRIEVAL = """
+import json, time, random
+import rag_engine
+retriever = rag_engine.get_retriever()
+with open("data/university_data.json", encoding="utf-8") as f:
+    questions = sorted({{item["question"] for item in json.load(f) if item.get("question")}})
+random.Random(0).shuffle(questions)
+timings = []
+for question in questions[:{queries}]:
+    started = time.perf_counter()
+    retriever.search(question + " ?", rag_engine.CONTEXT_CANDIDATES)
+    timings.append(time.perf_counter() - started)
+print(json.dumps(timings))
+"""
+
+ENCODE = """
+import json, time
+from utils.chunker import load_json_chunks
+from utils.local_embedder import embed_local, get_local_model
+chunks = load_json_chunks("data/university_data.json", max_chars=None)
+get_local_model()
+results = {{}}
+for batch_size in {batch_sizes}:
+    started = time.perf_counter()
+    embed_local(chunks, batch_size=batch_size)
+    results[batch_size] = len(chunks) / (time.perf_counter() - started)
+print(json.dumps(results))
+"""
+
+
+def scratch_dir(data_path):
+    path = tempfile.mkdtemp(prefix="local_embedder_")
+    os.makedirs(os.path.join(path, "data"))
+    os.symlink(data_path, os.path.join(path, "data", "university_data.json"))
+    return path
+
+def run(code, env, cwd):
+    env = dict(os.environ, PYTHONPATH=os.getcwd(), **env)
+    out = subprocess.run([sys.executable, "-c", code], env=env, cwd=cwd,
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def report(label, timings):
+    timings = sorted(t * 1000 for t in timings)
+    p95 = timings[int(len(timings) * 0.95)]
+    print(f"{label:<22} {statistics.median(timings):>8.1f} {p95:>8.1f} {statistics.mean(timings):>8.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark local vs remote query embedding")
+    parser.add_argument("--data", default="data/university_data.json")
+    parser.add_argument("--rtt", type=float, default=0.15, help="simulated remote round trip, seconds")
+    parser.add_argument("--threads", default="1,2,4")
+    parser.add_argument("--batch-sizes", default="16,64,256")
+    parser.add_argument("--queries", type=int, default=100)
+    args = parser.parse_args()
+    data_path = os.path.abspath(args.data)
+    retrieval = RETRIEVAL.format(queries=args.queries)
+
+    server = FakeOpenAIServer(latency=args.rtt).start_background()
+    print(f"Retrieval latency per uncached query (ms), {args.queries} queries")
+    print(f"{'embedder':<22} {'p50':>8} {'p95':>8} {'mean':>8}")
+    report(f"remote (rtt {args.rtt * 1000:.0f} ms)",
+           run(retrieval, {"EMBEDDER": "openai", "OPENAI_BASE_URL": server.base_url}, scratch_dir(data_path)))
+    server.shutdown()
+
+    for threads in args.threads.split(","):
+        env = {"EMBEDDER": "local", "EMBED_THREADS": threads}
+        report(f"local ({threads} threads)", run(retrieval, env, scratch_dir(data_path)))
+
+    batch_sizes = [int(b) for b in args.batch_sizes.split(",")]
+    print("\nBulk chunk encoding throughput (texts/s)")
+    print(f"{'threads':<8} " + " ".join(f"{'batch ' + str(b):>10}" for b in batch_sizes))
+    for threads in args.threads.split(","):
+        results = run(ENCODE.format(batch_sizes=batch_sizes), {"EMBED_THREADS": threads}, scratch_dir(data_path))
+        print(f"{threads:<8} " + " ".join(f"{results[str(b)]:>10.0f}" for b in batch_sizes))
+
+
+if __name__ == "__main__":
+    main()
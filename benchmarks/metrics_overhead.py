@@ -0,0 +1,38 @@
+# Cost of the tracing layer per instrumented stage, disabled vs enabled.
+#
+#   python -m benchmarks.metrics_overhead --calls 1000000
+
+import time
+import argparse
+from utils import metrics
+
+
+def per_call_ns(calls):
+    started = time.perf_counter()
+    for _ in range(calls):
+        with metrics.span("bench.stage"):
+            pass
+        metrics.count("bench.events")
+    return (time.perf_counter() - started) / calls * 1e9
+
+def baseline_ns(calls):
+    started = time.perf_counter()
+    for _ in range(calls):
+        pass
+    return (time.perf_counter() - started) / calls * 1e9
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark metrics overhead per stage")
+    parser.add_argument("--calls", type=int, default=1000000)
+    args = parser.parse_args()
+
+    empty = baseline_ns(args.calls)
+    print(f"{'mode':<10} {'ns per span + count':>20}")
+    for enabled in (False, True):
+        metrics.ENABLED = enabled
+        metrics.reset()
+        print(f"{'enabled' if enabled else 'disabled':<10} {per_call_ns(args.calls) - empty:>20.0f}")
+
+
+if __name__ == "__main__":
+    main()
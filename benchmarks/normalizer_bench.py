@@ -0,0 +1,94 @@
+# Compiled query normalizer vs the per-entry re.sub loops it replaced.
+# Fails loudly if the two ever disagree on the dataset questions.
+#
+#   python -m benchmarks.normalizer_bench
+
+import re
+import json
+import time
+import random
+import argparse
+from utils.lexicon import ABBREVIATIONS, SYNONYMS, PLURAL_REPLACEMENTS, CHAT_ABBREVIATIONS
+from utils.normalizer import query_normalizer, shorthand_expander
+
+
+# The original university_chatbot.normalize_input
+def legacy_normalize_input(text):
+    text = text.lower()
+    for abbr, full in ABBREVIATIONS.items():
+        text = re.sub(rf"\b{re.escape(abbr)}\b", full, text)
+    for syn, base in SYNONYMS.items():
+        text = re.sub(rf"\b{re.escape(syn)}\b", base, text)
+    for plural, singular in PLURAL_REPLACEMENTS.items():
+        text = re.sub(rf"\b{plural}\b", singular, text)
+    return text
+
+# The original rags.preprocess_text expansion step. It looked words up
+# lower-cased, so the upper-case keys (CSC, ECO, PHY, STAT) never matched.
+def legacy_expand(text):
+    return [CHAT_ABBREVIATIONS.get(word.lower(), word) for word in text.split()]
+
+def compiled_expand(text):
+    return shorthand_expander.expand_words(text.split())
+
+def compiled_expand_regex(text):
+    return shorthand_expander(text).split()
+
+# rags.normalize_text runs before expansion and leaves only letters, digits
+# and whitespace
+def strip_punctuation(text):
+    return re.sub(r"[^a-zA-Z0-9\s]", "", text)
+
+def make_queries(path, count, seed=0):
+    with open(path, "r", encoding="utf-8") as f:
+        questions = [e["question"] for e in json.load(f) if e.get("question")]
+    rng = random.Random(seed)
+    words = list(ABBREVIATIONS) + list(SYNONYMS) + list(PLURAL_REPLACEMENTS) + \
+        list(CHAT_ABBREVIATIONS) + ["csc", "Eco", "dept. of", "Dept.", "SIWES"]
+    queries = list(questions)
+    while len(queries) < count:
+        base = rng.choice(questions).split()
+        for _ in range(rng.randint(1, 4)):
+            base.insert(rng.randint(0, len(base)), rng.choice(words))
+        queries.append(" ".join(base))
+    return queries[:count]
+
+def bench(fn, queries, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for q in queries:
+            fn(q)
+        best = min(best, time.perf_counter() - started)
+    return best / len(queries) * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the compiled query normalizer")
+    parser.add_argument("--data", default="data/university_data.json")
+    parser.add_argument("--queries", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    queries = make_queries(args.data, args.queries)
+
+    mismatches = [q for q in queries if legacy_normalize_input(q) != query_normalizer(q)]
+    assert not mismatches, f"normalize_input differs on {len(mismatches)} queries, e.g. {mismatches[0]!r}"
+    stripped = [strip_punctuation(q) for q in queries]
+    mismatches = [q for q in stripped if legacy_expand(q) != compiled_expand(q)
+                  or " ".join(legacy_expand(q)) != " ".join(compiled_expand_regex(q))]
+    assert not mismatches, f"shorthand expansion differs on {len(mismatches)} queries, e.g. {mismatches[0]!r}"
+    print(f"[INFO] Outputs identical on {len(queries)} queries")
+
+    print(f"{'normalizer':<24} {'legacy us/q':>12} {'compiled us/q':>14} {'speedup':>8}")
+    for name, legacy, compiled, inputs in (
+        ("normalize_input", legacy_normalize_input, query_normalizer, queries),
+        ("shorthand (words)", legacy_expand, compiled_expand, stripped),
+        ("shorthand (regex)", legacy_expand, compiled_expand_regex, stripped),
+    ):
+        old = bench(legacy, inputs, args.repeat)
+        new = bench(compiled, inputs, args.repeat)
+        print(f"{name:<24} {old:>12.2f} {new:>14.2f} {old / new:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
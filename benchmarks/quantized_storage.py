@@ -0,0 +1,105 @@
+# Size, per-process memory and accuracy of compact embedding storage:
+# float32 / float16 / int8 vector stores (rags.py) and FAISS flat indexes
+# (rag_engine), each loaded into memory vs memory-mapped. Memory is the
+# private (anonymous) RSS a fresh worker process adds, which is what
+# multiplies across Streamlit workers; mapped pages are shared.
+#
+#   python -m benchmarks.quantized_storage --rows 20000 --dim 1536
+
+import os
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+import numpy as np
+from benchmarks.ann_index import synthetic_corpus, make_queries
+from utils import ann_index
+from utils.vector_store import FORMATS, VectorStore, write_store
+
+MEASURE = """
+import json, numpy as np
+def anon_mb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("RssAnon"):
+                return int(line.split()[1]) / 1024
+query = np.ones({dim}, dtype="float32")
+before = anon_mb()
+{load}
+for _ in range(5):
+    {search}
+print(json.dumps(anon_mb() - before))
+"""
+
+LOADERS = {
+    "numpy in memory": ("matrix = np.load({path!r})", "matrix @ query"),
+    "store mmap": ("from utils.vector_store import VectorStore; store = VectorStore({path!r})",
+                   "store.scores(query)"),
+    "faiss in memory": ("from utils import ann_index; index = ann_index.read_index({path!r})",
+                        "index.search(query[None, :], 10)"),
+    "faiss mmap": ("from utils import ann_index; index = ann_index.read_index({path!r}, mmap=True)",
+                   "index.search(query[None, :], 10)"),
+}
+
+
+def private_mb(loader, path, dim):
+    load, search = LOADERS[loader]
+    code = MEASURE.format(dim=dim, load=load.format(path=path), search=search)
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def top_k(scores, k):
+    return np.argsort(-scores, axis=1)[:, :k]
+
+def overlap(found, truth):
+    k = truth.shape[1]
+    return float(np.mean([len(set(f) & set(t)) / k for f, t in zip(found, truth)]))
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark quantized embedding storage")
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    corpus = synthetic_corpus(args.rows, args.dim)
+    queries = make_queries(corpus, args.queries)
+    exact = queries @ corpus.T
+    truth = top_k(exact, args.k)
+    workdir = tempfile.mkdtemp(prefix="quantized_storage_")
+
+    print(f"{args.rows} x {args.dim} normalized vectors, {args.queries} queries, top-{args.k}")
+    print(f"{'storage':<26} {'file MB':>8} {'private MB':>11} {'top-k overlap':>14} {'max |err|':>10}")
+
+    baseline = os.path.join(workdir, "matrix.npy")
+    np.save(baseline, corpus)
+    print(f"{'float32 numpy (before)':<26} {os.path.getsize(baseline) / 2**20:>8.1f} "
+          f"{private_mb('numpy in memory', baseline, args.dim):>11.1f} {1.0:>14.3f} {0.0:>10.1e}")
+
+    for fmt in FORMATS:
+        path = os.path.join(workdir, f"store.{fmt}.vec")
+        write_store(path, corpus, fmt)
+        store = VectorStore(path)
+        scores = np.stack([store.scores(q) for q in queries])
+        print(f"{'store ' + fmt + ' mmap':<26} {os.path.getsize(path) / 2**20:>8.1f} "
+              f"{private_mb('store mmap', path, args.dim):>11.1f} "
+              f"{overlap(top_k(scores, args.k), truth):>14.3f} {np.abs(scores - exact).max():>10.1e}")
+
+    for storage in ann_index.STORAGES:
+        index = ann_index.make_index(args.dim, "flat", "ip", storage=storage)
+        ann_index.add_vectors(index, corpus, np.arange(args.rows))
+        path = os.path.join(workdir, f"flat.{storage}.faiss")
+        ann_index.faiss.write_index(index, path)
+        scores, found = ann_index.search(index, queries, args.k)
+        errors = np.abs(scores - np.take_along_axis(exact, found, axis=1)).max()
+        for loader in ("faiss in memory", "faiss mmap"):
+            label = f"faiss {storage} {loader.split()[-1]}"
+            print(f"{label:<26} {os.path.getsize(path) / 2**20:>8.1f} "
+                  f"{private_mb(loader, path, args.dim):>11.1f} "
+                  f"{overlap(found, truth):>14.3f} {errors:>10.1e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# Per-query cost of the row work in rags.py: exact-question match and
+# materializing a top-5 result (answer, question, related questions), with
+# the columnar RecordStore vs the pandas DataFrame it replaced. Without
+# pandas installed the DataFrame rows are skipped and the exact match is
+# compared against a linear lower() == scan, which is what the DataFrame
+# filter did row by row.
+#
+#   python -m benchmarks.record_store --repeat 2000
+
+import time
+import random
+import argparse
+import tracemalloc
+import numpy as np
+from utils.record_store import load_records
+
+# Same fields as rags.FILTER_FIELDS (rags itself needs streamlit to import)
+FILTER_FIELDS = ("faculty", "department", "level", "semester")
+
+
+def per_call_us(fn, args_list, repeat):
+    started = time.perf_counter()
+    for i in range(repeat):
+        fn(*args_list[i % len(args_list)])
+    return (time.perf_counter() - started) / repeat * 1e6
+
+def allocated_mb(build):
+    tracemalloc.start()
+    value = build()
+    size = tracemalloc.get_traced_memory()[0] / 2**20
+    tracemalloc.stop()
+    return value, size
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the rags.py record store")
+    parser.add_argument("--data", default="data/university_data.json")
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    store, store_mb = allocated_mb(lambda: load_records(args.data, FILTER_FIELDS))
+    rng = random.Random(0)
+    prompts = [(rng.choice(store.questions).lower(),) for _ in range(200)]
+    hits = [(rng.sample(range(len(store)), 5),) for _ in range(200)]
+    mask = np.zeros(len(store), dtype=bool)
+    mask[::2] = True
+
+    def store_rows(rows):
+        return store.answers[rows[0]], store.questions[rows[0]], [store.questions[i] for i in rows[1:]]
+
+    def scan_exact(prompt):
+        for row, question in enumerate(store.questions):
+            if question.lower() == prompt:
+                return row
+
+    print(f"{len(store)} records, {args.repeat} calls each")
+    print(f"{'operation':<34} {'us/call':>10}")
+    print(f"{'store exact match':<34} {per_call_us(store.find_exact, prompts, args.repeat):>10.2f}")
+    print(f"{'store exact match (filtered)':<34} "
+          f"{per_call_us(lambda p: store.find_exact(p, mask), prompts, args.repeat):>10.2f}")
+    print(f"{'store top-5 rows':<34} {per_call_us(store_rows, hits, args.repeat):>10.2f}")
+    print(f"{'linear lower() == scan':<34} {per_call_us(scan_exact, prompts, args.repeat // 10):>10.2f}")
+
+    try:
+        import pandas as pd
+    except ImportError:
+        print(f"\nstore memory {store_mb:.1f} MB; pandas not installed, DataFrame rows skipped")
+        return
+
+    records = [{"question": q, "answer": a, "text": t, **{f: store.value(f, row) for f in FILTER_FIELDS}}
+               for row, (q, a, t) in enumerate(zip(store.questions, store.answers, store.texts))]
+    frame, frame_mb = allocated_mb(lambda: pd.DataFrame(records))
+
+    def frame_exact(prompt):
+        matched = frame[frame["question"].str.lower() == prompt]
+        return None if matched.empty else matched.iloc[0]["answer"]
+
+    def frame_exact_filtered(prompt):
+        filtered = frame[mask]
+        matched = filtered[filtered["question"].str.lower() == prompt]
+        return None if matched.empty else matched.iloc[0]["answer"]
+
+    def frame_rows(rows):
+        return (frame.iloc[rows[0]]["answer"], frame.iloc[rows[0]]["question"],
+                [frame.iloc[i]["question"] for i in rows[1:]])
+
+    print(f"{'pandas exact match':<34} {per_call_us(frame_exact, prompts, args.repeat // 10):>10.2f}")
+    print(f"{'pandas exact match (filtered)':<34} "
+          f"{per_call_us(frame_exact_filtered, prompts, args.repeat // 10):>10.2f}")
+    print(f"{'pandas top-5 rows':<34} {per_call_us(frame_rows, hits, args.repeat // 10):>10.2f}")
+    print(f"\nmemory: store {store_mb:.1f} MB, DataFrame {frame_mb:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
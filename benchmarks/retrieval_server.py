@@ -0,0 +1,141 @@
+# In-process retrieval vs the shared retrieval server (rag_engine backend).
+#
+# Memory: --workers UI-like processes that each load the retriever, vs one
+# server plus the same number of thin clients, as private (anonymous) RSS.
+# Throughput: --sessions threads issuing distinct queries at once, straight
+# at an in-process Retriever vs through the server over a Unix socket, with
+# the number of embeddings requests the stand-in OpenAI server received.
+# Runs in scratch directories, so the tracked index is left alone.
+#
+#   python -m benchmarks.retrieval_server --workers 4 --sessions 16 --queries 400
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+from benchmarks.fake_openai_server import FakeOpenAIServer
+from benchmarks.load_test import build_workload
+
+ANON_MB = """
+def anon_mb():
+    with open("/proc/self/status") as f:
+        return next(int(line.split()[1]) / 1024 for line in f if line.startswith("RssAnon"))
+"""
+
+WORKER = ANON_MB + """
+import sys, rag_engine
+rag_engine.get_retrieval_backend().search("How do I register for courses?", 8)
+print(anon_mb(), flush=True)
+sys.stdin.read()
+"""
+
+LOAD = ANON_MB + """
+import json, time
+from concurrent.futures import ThreadPoolExecutor
+import rag_engine
+with open({workload!r}, encoding="utf-8") as f:
+    queries = [q for _, q in json.load(f)]
+backend = rag_engine.get_retrieval_backend()
+backend.search("warm up", 8)
+timings = []
+def timed(query):
+    started = time.perf_counter()
+    backend.search(query, 8)
+    timings.append(time.perf_counter() - started)
+started = time.perf_counter()
+with ThreadPoolExecutor({sessions}) as pool:
+    list(pool.map(timed, queries))
+print(json.dumps({{"wall": time.perf_counter() - started, "timings": sorted(timings)}}))
+"""
+
+
+def scratch_dir(data_path):
+    path = tempfile.mkdtemp(prefix="retrieval_server_")
+    os.makedirs(os.path.join(path, "data"))
+    os.symlink(data_path, os.path.join(path, "data", "university_data.json"))
+    return path
+
+def popen(args, env, cwd, **kwargs):
+    env = dict(os.environ, PYTHONPATH=os.getcwd(), **env)
+    return subprocess.Popen([sys.executable] + args, env=env, cwd=cwd, text=True, **kwargs)
+
+def start_server(socket_path, env, cwd):
+    server = popen([os.path.join(os.getcwd(), "retrieval_server.py"), "--socket", socket_path, "--apps", "rag_engine"],
+                   env, cwd, stdout=subprocess.DEVNULL)
+    while not os.path.exists(socket_path):
+        if server.poll() is not None:
+            raise RuntimeError("retrieval server exited")
+        time.sleep(0.1)
+    return server
+
+def process_anon_mb(pid):
+    with open(f"/proc/{pid}/status") as f:
+        return next(int(line.split()[1]) / 1024 for line in f if line.startswith("RssAnon"))
+
+def workers_mb(count, env, cwd):
+    procs = [popen(["-c", WORKER], env, cwd, stdin=subprocess.PIPE, stdout=subprocess.PIPE) for _ in range(count)]
+    sizes = [float(p.stdout.readline()) for p in procs]
+    for p in procs:
+        p.communicate("")
+    return sum(sizes)
+
+def run_load(workload_path, sessions, env, cwd):
+    code = LOAD.format(workload=workload_path, sessions=sessions)
+    out = subprocess.run([sys.executable, "-c", code], env=dict(os.environ, PYTHONPATH=os.getcwd(), **env),
+                         cwd=cwd, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the shared retrieval server")
+    parser.add_argument("--data", default="data/university_data.json")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--sessions", type=int, default=16)
+    parser.add_argument("--queries", type=int, default=400)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per embeddings request")
+    args = parser.parse_args()
+
+    data_path = os.path.abspath(args.data)
+    workload_path = os.path.join(tempfile.mkdtemp(prefix="retrieval_server_"), "workload.json")
+    with open(workload_path, "w", encoding="utf-8") as f:
+        json.dump(build_workload(data_path, args.queries, seed=2), f)
+
+    fake = FakeOpenAIServer(latency=args.latency).start_background()
+    base_env = {"OPENAI_BASE_URL": fake.base_url, "OPENAI_API_KEY": "bench"}
+    cwd = scratch_dir(data_path)
+    # Build the index and embedding cache once so every case starts warm
+    subprocess.run([sys.executable, "-c", "import rag_engine; rag_engine.get_retriever()"],
+                   env=dict(os.environ, PYTHONPATH=os.getcwd(), **base_env), cwd=cwd,
+                   capture_output=True, check=True)
+
+    socket_path = os.path.join(tempfile.mkdtemp(prefix="retrieval_server_"), "retrieval.sock")
+    client_env = dict(base_env, RETRIEVAL_SERVER=f"unix://{socket_path}")
+
+    print(f"Private memory, {args.workers} workers (MB)")
+    in_process = workers_mb(args.workers, base_env, cwd)
+    server = start_server(socket_path, base_env, cwd)
+    try:
+        clients = workers_mb(args.workers, client_env, cwd)
+        server_mb = process_anon_mb(server.pid)
+        print(f"{'in-process retrievers':<28} {in_process:>8.0f}")
+        print(f"{'server + thin clients':<28} {server_mb + clients:>8.0f}  (server {server_mb:.0f})")
+
+        print(f"\n{args.queries} distinct queries from {args.sessions} concurrent sessions")
+        print(f"{'mode':<28} {'qps':>8} {'p50 ms':>8} {'p95 ms':>8} {'embed reqs':>11}")
+        for label, env in (("in-process", base_env), ("retrieval server", client_env)):
+            before = fake.requests
+            result = run_load(workload_path, args.sessions, env, cwd)
+            timings = result["timings"]
+            print(f"{label:<28} {len(timings) / result['wall']:>8.1f} "
+                  f"{timings[len(timings) // 2] * 1000:>8.1f} {timings[int(len(timings) * 0.95)] * 1000:>8.1f} "
+                  f"{fake.requests - before:>11}")
+    finally:
+        server.terminate()
+        server.wait()
+        fake.shutdown()
+
+
+if __name__ == "__main__":
+    main()
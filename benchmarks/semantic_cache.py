@@ -0,0 +1,57 @@
+# Hit rate, wrong-answer rate and lookup cost of the semantic fallback cache
+# at several similarity thresholds. Synthetic stand-in for real traffic:
+# --intents distinct questions (clustered, like related course questions),
+# asked --queries times with Zipf popularity, each time reworded as a noisy
+# copy of the intent's embedding (cosine roughly 0.85-0.98 to the original).
+# A hit returning another intent's reply counts as wrong. Every miss is an
+# LLM call taking --llm-seconds.
+#
+#   python -m benchmarks.semantic_cache --queries 5000 --thresholds 0.85,0.9,0.92,0.95
+
+import time
+import argparse
+import numpy as np
+from benchmarks.ann_index import synthetic_corpus
+from utils.semantic_cache import SemanticCache
+
+
+def reworded(intents, count, dim, seed=1):
+    rng = np.random.default_rng(seed)
+    popularity = 1.0 / np.arange(1, len(intents) + 1)
+    asked = rng.choice(len(intents), count, p=popularity / popularity.sum())
+    noise = rng.uniform(0.2, 0.6, (count, 1)).astype("float32")
+    queries = intents[asked] + noise * rng.standard_normal((count, dim), dtype="float32") / np.sqrt(dim)
+    return asked, queries / np.linalg.norm(queries, axis=1, keepdims=True)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the semantic fallback cache")
+    parser.add_argument("--intents", type=int, default=1000)
+    parser.add_argument("--queries", type=int, default=5000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--size", type=int, default=512)
+    parser.add_argument("--thresholds", default="0.85,0.9,0.92,0.95")
+    parser.add_argument("--llm-seconds", type=float, default=1.5)
+    args = parser.parse_args()
+
+    intents = synthetic_corpus(args.intents, args.dim)
+    asked, queries = reworded(intents, args.queries, args.dim)
+    print(f"{args.queries} queries over {args.intents} intents, cache size {args.size}, dim {args.dim}")
+    print(f"{'threshold':>9} {'hit rate':>9} {'wrong':>7} {'LLM calls':>10} {'saved s':>9} {'lookup us':>10}")
+    for threshold in [float(t) for t in args.thresholds.split(",")]:
+        cache = SemanticCache(threshold=threshold, maxsize=args.size)
+        wrong, lookup = 0, 0.0
+        for intent, query in zip(asked, queries):
+            started = time.perf_counter()
+            reply = cache.get(query)
+            lookup += time.perf_counter() - started
+            if reply is None:
+                cache.set(query, int(intent), latency=args.llm_seconds)
+            elif reply != intent:
+                wrong += 1
+        stats = cache.stats()
+        print(f"{threshold:>9.2f} {stats['hit_rate']:>9.3f} {wrong / args.queries:>7.3f} "
+              f"{stats['misses']:>10} {stats['saved_seconds']:>9.0f} {lookup / args.queries * 1e6:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+# Cold-start cost of SymSpell: parsing the text dictionary vs loading the
+# prepared snapshot. Each run is a fresh interpreter, like a new worker.
+#
+#   python -m benchmarks.symspell_startup --runs 3
+
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+DICTIONARY_LOAD = """
+import time, json
+from symspellpy import SymSpell
+started = time.perf_counter()
+sym_spell = SymSpell(max_dictionary_edit_distance=2, prefix_length=7)
+sym_spell.load_dictionary({path!r}, term_index=0, count_index=1)
+print(json.dumps(time.perf_counter() - started))
+"""
+
+SNAPSHOT_LOAD = """
+import time, json
+from utils.spelling import load_sym_spell
+started = time.perf_counter()
+load_sym_spell({path!r}, max_edit_distance=2, prefix_length=7)
+print(json.dumps(time.perf_counter() - started))
+"""
+
+
+def time_runs(code, runs):
+    timings = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        timings.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark SymSpell cold start")
+    parser.add_argument("--dictionary", default="frequency_dictionary_en_82_765.txt")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    # First snapshot load builds the snapshot if it is missing
+    time_runs(SNAPSHOT_LOAD.format(path=args.dictionary), 1)
+
+    print(f"{'method':<18} {'median s':>9} {'min s':>7}")
+    for name, code in (("load_dictionary", DICTIONARY_LOAD), ("snapshot", SNAPSHOT_LOAD)):
+        timings = time_runs(code.format(path=args.dictionary), args.runs)
+        print(f"{name:<18} {statistics.median(timings):>9.2f} {min(timings):>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
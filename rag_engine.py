@@ -1,75 +1,550 @@
 import os
+import json
+import time
+import asyncio
+import hashlib
+import threading
 import faiss
-import openai
+import numpy as np
 from dotenv import load_dotenv
-from utils.chunker import load_json_chunks
+from utils.chunker import iter_chunks
+from utils.embeddings import new_async_client, embed_batch, embed_texts, clean_text
+from utils.embedding_cache import get_embedding_cache
+from utils.cache import get_cache, normalize_query
+from utils.hybrid import SparseIndex, reciprocal_rank_fusion
+from utils import ann_index, local_embedder, retrieval_client
+from utils.metrics import span, count
+from utils.llm import stream_chat
+from utils.context import build_context, count_message_tokens
 
-# Load environment variables
+# Load environment variables (OPENAI_API_KEY is read by the shared client)
 load_dotenv()
-openai.api_key = os.getenv("OPENAI_API_KEY")
 
-# Embedding function
-def get_embedding(text, model="text-embedding-3-small"):
-    from openai import OpenAI
-    import os
+# Knowledge base: one .json / .jsonl file, or several separated by os.pathsep
+DATA_PATH = os.getenv("DATA_PATH", "data/university_data.json")
+# Answers longer than this are split on sentence boundaries (0 keeps them
+# whole), consecutive parts sharing CHUNK_OVERLAP sentences
+CHUNK_MAX_CHARS = int(os.getenv("CHUNK_MAX_CHARS", "1000"))
+CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "1"))
+# New chunks are embedded and added to the index this many at a time
+INDEX_SYNC_BATCH = int(os.getenv("INDEX_SYNC_BATCH", "4096"))
+INDEX_DIR = "faiss_index"
+INDEX_FILE = os.path.join(INDEX_DIR, "index.faiss")
+MANIFEST_FILE = os.path.join(INDEX_DIR, "manifest.json")
+# EMBEDDER selects where embeddings come from: "openai" (remote API) or
+# "local" (sentence-transformers on this machine, see utils/local_embedder.py).
+# Switching embedders rebuilds the index for the new model; set EMBEDDING_DIM
+# for local models other than all-MiniLM-L6-v2.
+EMBEDDER = os.getenv("EMBEDDER", "openai")
+if EMBEDDER == "local":
+    EMBEDDING_MODEL = local_embedder.LOCAL_MODEL
+    EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", "384"))
+else:
+    EMBEDDING_MODEL = "text-embedding-3-small"
+    EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", "1536"))
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "100"))
+EMBED_WORKERS = int(os.getenv("EMBED_WORKERS", "4"))
+# Candidates taken from each of the dense and BM25 rankings before fusion
+FUSION_CANDIDATES = 20
+# Serve the index memory-mapped (shared across processes) once it is in sync
+INDEX_MMAP = os.getenv("INDEX_MMAP", "1") == "1"
+# Most inputs the embeddings endpoint accepts in one request
+MAX_EMBED_INPUTS = 2048
+# Prompt context: retrieved candidates are packed into this many tokens
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500"))
+CONTEXT_CANDIDATES = int(os.getenv("CONTEXT_CANDIDATES", "8"))
+# Retries for a query embedding, as the OpenAI client's own default
+QUERY_EMBED_RETRIES = 2
+# Chat calls in flight at once during answer_many
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
 
-    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-    text = text.replace("\n", " ").strip()
-    
+# The shared client does not retry (batches back off in embed_batch), so
+# single-query embeddings go through embed_batch too
+def _embed_remote(texts, model):
     try:
-        response = client.embeddings.create(input=[text], model=model)
-        return response.data[0].embedding
+        return embed_batch(texts, model, max_retries=QUERY_EMBED_RETRIES)
     except Exception as e:
         print(f"[ERROR] Embedding failed: {e}")
-        return [0.0] * 1536  # fallback vector if embedding fails
+        return [None] * len(texts)
+
+def embed_local_safe(texts):
+    try:
+        return local_embedder.embed_local(texts)
+    except Exception as e:
+        print(f"[ERROR] Local embedding failed: {e}")
+        return [None] * len(texts)
+
+# Embeddings for texts from the selected embedder; None where it failed.
+# Remote batches are split and sent concurrently, local ones go through the
+# model in batched forward passes.
+def compute_embeddings(texts, batch_size=EMBED_BATCH_SIZE, max_workers=EMBED_WORKERS):
+    if EMBEDDER == "local":
+        return embed_local_safe(texts)
+    if len(texts) == 1:
+        return _embed_remote(texts, EMBEDDING_MODEL)
+    return embed_texts(texts, EMBEDDING_MODEL, batch_size=batch_size, max_workers=max_workers)
+
+def lookup_embedding(text, model=EMBEDDING_MODEL):
+    text = clean_text(text)
+    if model != EMBEDDING_MODEL:
+        compute = lambda batch: _embed_remote(batch, model)
+    else:
+        compute = compute_embeddings
+    return get_embedding_cache(model).get_or_compute([text], compute)[0]
+
+# Embedding function
+def get_embedding(text, model=EMBEDDING_MODEL):
+    vector = lookup_embedding(text, model)
+    if vector is None:
+        return [0.0] * EMBEDDING_DIM  # fallback vector if embedding fails
+    return vector
 
+# In-memory caches for hot questions, in front of the on-disk embedding cache
+query_embedding_cache = get_cache("rag_engine.query_embedding")
+search_cache = get_cache("rag_engine.search")
+answer_cache = get_cache("rag_engine.answer")
 
-# Load and chunk the JSON data
-def get_chunks():
-    return load_json_chunks("data/university_data.json")
+# Query embedding, or None if it could not be computed (failures are not cached)
+def get_query_embedding(query):
+    key = clean_text(query)
+    vector = query_embedding_cache.get(key)
+    if vector is None:
+        with span("rag_engine.embed_query"):
+            vector = lookup_embedding(key)
+        if vector is not None:
+            query_embedding_cache.set(key, vector)
+    return vector
+
+# Batched get_query_embedding: every query missing from the caches goes out
+# in a single embeddings request (or one batched local encode)
+def get_query_embeddings(queries):
+    keys = [clean_text(q) for q in queries]
+    vectors = [query_embedding_cache.get(key) for key in keys]
+    missing = list(dict.fromkeys(key for key, vec in zip(keys, vectors) if vec is None))
+    if missing:
+        computed = get_embedding_cache(EMBEDDING_MODEL).get_or_compute(
+            missing,
+            lambda batch: compute_embeddings(batch, batch_size=MAX_EMBED_INPUTS),
+        )
+        found = {}
+        for key, vector in zip(missing, computed):
+            if vector is not None:
+                query_embedding_cache.set(key, vector)
+                found[key] = vector
+        vectors = [found.get(key) if vec is None else vec for key, vec in zip(keys, vectors)]
+    return vectors
+
+
+def data_paths(path):
+    return [p for p in path.split(os.pathsep) if p] if isinstance(path, str) else list(path)
+
+# Content hash of the knowledge base files, used to detect stale indexes
+def file_hash(path):
+    digest = hashlib.sha256()
+    for data_file in data_paths(path):
+        with open(data_file, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+def data_mtime(path):
+    return tuple(os.path.getmtime(data_file) for data_file in data_paths(path))
+
+def read_manifest(manifest_file=MANIFEST_FILE):
+    try:
+        with open(manifest_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
 
-# Build or load FAISS index
-def build_or_load_faiss_index(chunks, dim=1536):
-    index_file = "faiss_index/index.faiss"
+def write_manifest(manifest, manifest_file=MANIFEST_FILE):
+    tmp_file = manifest_file + ".tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_file, manifest_file)
 
-    if os.path.exists(index_file):
+# Chunks are streamed from the data files (utils/chunker.py); IDs are
+# chunk_id(text), so unchanged chunks keep their place in the index
+def iter_data_chunks(path=DATA_PATH):
+    return iter_chunks(data_paths(path), CHUNK_MAX_CHARS or None, CHUNK_OVERLAP)
+
+def get_chunks(path=DATA_PATH):
+    return [chunk.text for chunk in iter_data_chunks(path)]
+
+def get_chunk_map(path=DATA_PATH):
+    return {chunk.id: chunk.text for chunk in iter_data_chunks(path)}
+
+# Index type comes from INDEX_KIND / INDEX_METRIC (see utils/ann_index.py)
+def new_faiss_index(dim=EMBEDDING_DIM, size=0):
+    return ann_index.make_index(dim, size=size)
+
+def embed_chunks(chunks):
+    # Only chunks whose text is not in the embedding cache get embedded
+    return get_embedding_cache(EMBEDDING_MODEL).get_or_compute(chunks, compute_embeddings)
+
+# Bring an ID-mapped index in line with the current chunks: drop IDs that no
+# longer exist, embed and add new ones. Chunks that fail to embed are left out
+# of the index and listed as pending, so the next sync retries them. Indexes
+# that cannot drop vectors (HNSW) are rebuilt from the embedding cache
+# instead. Returns the synced index and its manifest.
+def sync_faiss_index(index, manifest, chunk_map, dim=EMBEDDING_DIM):
+    indexed = set(manifest.get("ids", []))
+    current = set(chunk_map)
+
+    stale = sorted(indexed - current)
+    if stale and not ann_index.supports_remove(index):
+        print(f"[INFO] {ann_index.index_kind(index)} index cannot remove vectors; rebuilding...")
+        index, indexed = new_faiss_index(dim, size=len(current)), set()
+    elif stale:
+        index.remove_ids(np.array(stale, dtype="int64"))
+        indexed.difference_update(stale)
+
+    missing = sorted(current - indexed)
+    added, pending = 0, []
+    if missing and not index.is_trained:
+        # A fresh IVF index: size its lists to the data now that it is known
+        index = new_faiss_index(dim, size=len(missing))
+        if len(missing) < ann_index.min_training_vectors(index):
+            print(f"[WARN] Too few vectors ({len(missing)}) to train a {ann_index.index_kind(index)} "
+                  f"index; using a flat index.")
+            index = ann_index.make_index(dim, kind="flat")
+    # Embedded a batch at a time so only one batch of vectors is held at once;
+    # an untrained index gets enough in its first batch to train on
+    batch_size = max(INDEX_SYNC_BATCH, ann_index.min_training_vectors(index))
+    for start in range(0, len(missing), batch_size):
+        batch = missing[start:start + batch_size]
+        vectors = embed_chunks([chunk_map[i] for i in batch])
+        ok = [(i, vec) for i, vec in zip(batch, vectors) if vec is not None]
+        pending.extend(i for i, vec in zip(batch, vectors) if vec is None)
+        if ok and (index.is_trained or len(ok) >= ann_index.min_training_vectors(index)):
+            ann_index.add_vectors(index, [v for _, v in ok], [i for i, _ in ok])
+            indexed.update(i for i, _ in ok)
+            added += len(ok)
+        else:
+            pending.extend(i for i, _ in ok)
+
+    print(f"[INFO] Index sync: {added} added, {len(stale)} removed, "
+          f"{len(pending)} pending, {index.ntotal} total")
+    return index, {
+        "version": 1,
+        "model": EMBEDDING_MODEL,
+        "dim": dim,
+        "index_kind": ann_index.index_kind(index),
+        "metric": ann_index.index_metric(index),
+        "storage": ann_index.index_storage(index),
+        "ids": sorted(indexed),
+        "pending": sorted(pending),
+        "synced_at": time.time(),
+    }
+
+def save_faiss_index(index, manifest, index_file=INDEX_FILE, manifest_file=MANIFEST_FILE):
+    os.makedirs(os.path.dirname(index_file), exist_ok=True)
+    # Write to a temp file first so readers never see a half-written index
+    tmp_file = index_file + ".tmp"
+    faiss.write_index(index, tmp_file)
+    os.replace(tmp_file, index_file)
+    write_manifest(manifest, manifest_file)
+
+# mmap=True maps the index read-only; never pass a mapped index to sync
+def load_faiss_index(dim=EMBEDDING_DIM, mmap=False):
+    manifest = read_manifest()
+    # Indexes written before the index factory are flat L2 float32
+    compatible = (manifest.get("model") == EMBEDDING_MODEL and manifest.get("dim") == dim
+                  and manifest.get("index_kind", "flat") == ann_index.INDEX_KIND
+                  and manifest.get("metric", "l2") == ann_index.INDEX_METRIC
+                  and manifest.get("storage", "float32") in (ann_index.INDEX_STORAGE, "pq"))
+    if compatible and os.path.exists(INDEX_FILE):
         try:
-            index = faiss.read_index(index_file)
-            return index
+            index = ann_index.read_index(INDEX_FILE, mmap=mmap)
+            if index.ntotal == len(manifest.get("ids", [])):
+                return index, manifest
+            print("[WARN] Index does not match its manifest. Rebuilding...")
         except Exception as e:
             print(f"[WARN] Failed to load existing index: {e}. Rebuilding...")
+    return new_faiss_index(dim), {}
+
+# Build or load FAISS index, syncing it with the chunks when the data file
+# changed or earlier embeddings failed. Returns the index and its manifest.
+# An index that needs syncing is loaded into memory and modified there; the
+# result is saved and then served from the memory-mapped file.
+def build_or_load_faiss_index(chunk_map, dim=EMBEDDING_DIM, data_hash=None):
+    manifest = read_manifest()
+    up_to_date = (data_hash is not None and manifest.get("data_hash") == data_hash
+                  and not manifest.get("pending"))
+    index, manifest = load_faiss_index(dim, mmap=INDEX_MMAP and up_to_date)
+    if up_to_date and manifest:
+        return index, manifest
 
-    print("[INFO] Building new FAISS index...")
-    index = faiss.IndexFlatL2(dim)
-    vectors = [get_embedding(c) for c in chunks]
-    index.add(vectors)
+    if manifest:
+        print("[INFO] Updating FAISS index incrementally...")
+    else:
+        print("[INFO] Building new FAISS index...")
+    index, manifest = sync_faiss_index(index, manifest, chunk_map, dim)
+    manifest["data_hash"] = data_hash
+    save_faiss_index(index, manifest)
+    if INDEX_MMAP:
+        index = ann_index.read_index(INDEX_FILE, mmap=True)
+    return index, manifest
 
-    os.makedirs("faiss_index", exist_ok=True)
-    faiss.write_index(index, index_file)
-    return index
+# Chunk IDs nearest to the query embedding
+def search_chunk_ids(query, index, top_k=3):
+    vector = get_query_embedding(query)
+    if vector is None:
+        return []
+    with span("rag_engine.faiss_search"):
+        D, I = ann_index.search(index, [vector], top_k)
+    return [int(i) for i in I[0] if i >= 0]
 
-# Search relevant chunks for the query
+# One FAISS search over the stacked query matrix. Queries without a vector
+# (failed embeddings) get no dense hits.
+def search_chunk_ids_many(vectors, index, top_k=3):
+    results = [[] for _ in vectors]
+    rows = [i for i, vec in enumerate(vectors) if vec is not None]
+    if rows:
+        D, I = ann_index.search(index, [vectors[i] for i in rows], top_k)
+        for row, ids in zip(rows, I):
+            results[row] = [int(i) for i in ids if i >= 0]
+    return results
+
+# Search relevant chunks for the query; chunks maps chunk ID -> text
 def search_chunks(query, chunks, index, top_k=3):
-    query_vec = get_embedding(query)
-    D, I = index.search([query_vec], top_k)
-    return [chunks[i] for i in I[0] if i < len(chunks)]
+    return [chunks[i] for i in search_chunk_ids(query, index, top_k) if i in chunks]
 
-# Main chatbot function
-def get_chat_response(query):
-    chunks = get_chunks()
-    index = build_or_load_faiss_index(chunks)
-    relevant_chunks = search_chunks(query, chunks, index)
+# Course codes are answered straight from the hash map (topped up from BM25,
+# still without an embedding call); everything else fuses the dense and BM25
+# rankings with reciprocal rank fusion. dense_ids, when given, is the dense
+# ranking already computed by a batched search.
+def hybrid_search(query, chunks, index, sparse, top_k=3, dense_ids=None):
+    with span("rag_engine.code_lookup"):
+        ids = sparse.code_matches(query)
+    if ids:
+        count("rag_engine.code_lookups")
+        ids += [i for i in sparse.bm25_matches(query, top_k) if i not in ids]
+    else:
+        if dense_ids is None:
+            dense_ids = search_chunk_ids(query, index, FUSION_CANDIDATES)
+        with span("rag_engine.bm25"):
+            sparse_ids = sparse.bm25_matches(query, FUSION_CANDIDATES)
+        ids = reciprocal_rank_fusion([dense_ids, sparse_ids])
+    return [chunks[i] for i in ids[:top_k] if i in chunks]
 
-    context = "\n".join(relevant_chunks)
-    prompt = f"""You are a helpful university assistant.
+
+# --- Long-lived retriever ---
+# Keeps chunks, the FAISS index and the sparse (BM25 + course code) index
+# resident for the life of the process. The data file
+# is polled (mtime first, hash only when it moved) and a changed knowledge base
+# is synced on a background thread, then swapped in atomically. Chunks that
+# failed to embed are retried on the same schedule.
+class Retriever:
+    def __init__(self, data_path=DATA_PATH, check_interval=30.0):
+        self.data_path = data_path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._rebuild_thread = None
+        self._last_check = time.monotonic()
+        self._data_mtime = data_mtime(data_path)
+        self.data_hash = file_hash(data_path)
+        self.chunks = get_chunk_map(data_path)
+        self.index, manifest = build_or_load_faiss_index(self.chunks, data_hash=self.data_hash)
+        self.sparse = SparseIndex(self.chunks)
+        self.pending = len(manifest.get("pending", []))
+
+    def snapshot(self):
+        with self._lock:
+            return self.chunks, self.index, self.sparse, self.data_hash
+
+    def data_changed(self):
+        try:
+            mtime = data_mtime(self.data_path)
+        except OSError:
+            return False
+        if mtime == self._data_mtime:
+            return False
+        self._data_mtime = mtime
+        return file_hash(self.data_path) != self.data_hash
+
+    # Check-and-start runs under its own lock so concurrent sessions never
+    # start two rebuilds writing the same index files; a thread that finds
+    # another one checking just carries on with the current index
+    def maybe_refresh(self):
+        if time.monotonic() - self._last_check < self.check_interval:
+            return
+        if not self._refresh_lock.acquire(blocking=False):
+            return
+        try:
+            now = time.monotonic()
+            if now - self._last_check < self.check_interval:
+                return
+            self._last_check = now
+            if self._rebuild_thread is not None and self._rebuild_thread.is_alive():
+                return
+            if self.data_changed() or self.pending:
+                print("[INFO] Syncing index in the background...")
+                self._rebuild_thread = threading.Thread(target=self._rebuild, daemon=True)
+                self._rebuild_thread.start()
+        finally:
+            self._refresh_lock.release()
+
+    def _rebuild(self):
+        try:
+            data_hash = file_hash(self.data_path)
+            chunks = get_chunk_map(self.data_path)
+            index, manifest = build_or_load_faiss_index(chunks, data_hash=data_hash)
+            sparse = SparseIndex(chunks)
+        except Exception as e:
+            print(f"[ERROR] Background index sync failed: {e}")
+            return
+        with self._lock:
+            self.chunks, self.index, self.sparse, self.data_hash = chunks, index, sparse, data_hash
+            self.pending = len(manifest.get("pending", []))
+        print(f"[INFO] Swapped in synced index ({index.ntotal} chunks).")
+
+    def search(self, query, top_k=3):
+        self.maybe_refresh()
+        chunks, index, sparse, data_hash = self.snapshot()
+        key = (normalize_query(query), top_k, data_hash)
+        results = search_cache.get(key)
+        if results is None:
+            results = hybrid_search(query, chunks, index, sparse, top_k)
+            if results:
+                search_cache.set(key, results)
+        return results
+
+    # search() for a list of queries: the uncached ones that need dense
+    # retrieval share one embeddings request and one FAISS search
+    def search_many(self, queries, top_k=3):
+        self.maybe_refresh()
+        chunks, index, sparse, data_hash = self.snapshot()
+        keys = [(normalize_query(q), top_k, data_hash) for q in queries]
+        results = [search_cache.get(key) for key in keys]
+        todo = [i for i, r in enumerate(results) if r is None]
+        # Course-code queries never need an embedding
+        dense = [i for i in todo if not sparse.code_matches(queries[i])]
+        vectors = get_query_embeddings([queries[i] for i in dense])
+        dense_ids = dict(zip(dense, search_chunk_ids_many(vectors, index, FUSION_CANDIDATES)))
+        for i in todo:
+            results[i] = hybrid_search(queries[i], chunks, index, sparse, top_k, dense_ids.get(i))
+            if results[i]:
+                search_cache.set(keys[i], results[i])
+        return results
+
+
+_retriever = None
+_retriever_lock = threading.Lock()
+
+def get_retriever():
+    global _retriever
+    if _retriever is None:
+        with _retriever_lock:
+            if _retriever is None:
+                _retriever = Retriever()
+    return _retriever
+
+# Where the answering code retrieves from: this process's Retriever, or the
+# shared retrieval_server.py when RETRIEVAL_SERVER is set (thin-client mode,
+# see utils/retrieval_client.py)
+def get_retrieval_backend():
+    if retrieval_client.enabled():
+        return retrieval_client.get_remote_retriever()
+    return get_retriever()
+
+CHAT_MODEL = "gpt-4"
+
+def build_prompt(query, context):
+    return f"""You are a helpful university assistant.
 Use the following context to answer the user's question.\n
 Context:\n{context}\n
 Question: {query}
 Answer:"""
 
-    response = openai.ChatCompletion.create(
-        model="gpt-4",
-        messages=[{"role": "user", "content": prompt}]
+# Chat messages for the query with as many of the candidate chunks (best
+# first, near-duplicates dropped) as fit the context budget
+def build_messages(query, candidates):
+    with span("rag_engine.build_context"):
+        context = build_context(candidates, CONTEXT_TOKEN_BUDGET, CHAT_MODEL)
+        messages = [{"role": "user", "content": build_prompt(query, context.text)}]
+        prompt_tokens = count_message_tokens(messages, CHAT_MODEL)
+    count("rag_engine.prompt_tokens", prompt_tokens)
+    print(f"[INFO] Prompt: {prompt_tokens} tokens, {len(context.chunks)}/{len(candidates)} chunks "
+          f"({context.duplicates} duplicates, {context.skipped} over budget)")
+    return messages
+
+# Streaming chatbot: yields the answer piece by piece as the model produces
+# it. A cached answer comes back as a single piece; a fresh one is cached
+# once it has streamed in full.
+def stream_chat_response(query):
+    retriever = get_retrieval_backend()
+    count("rag_engine.requests")
+    answer_key = (normalize_query(query), retriever.data_hash)
+    cached = answer_cache.get(answer_key)
+    if cached is not None:
+        count("rag_engine.cached_answers")
+        yield cached
+        return
+
+    with span("rag_engine.retrieve"):
+        relevant_chunks = retriever.search(query, CONTEXT_CANDIDATES)
+    messages = build_messages(query, relevant_chunks)
+    yield from stream_chat(
+        messages,
+        model=CHAT_MODEL,
+        on_complete=lambda answer: answer_cache.set(answer_key, answer.strip()),
     )
 
+# Main chatbot function
+def get_chat_response(query):
+    return "".join(stream_chat_response(query)).strip()
+
+
+# --- Batch answering ---
+async def _generate(client, semaphore, query, relevant_chunks):
+    async with semaphore:
+        response = await client.chat.completions.create(
+            model=CHAT_MODEL,
+            messages=build_messages(query, relevant_chunks),
+        )
     return response.choices[0].message.content.strip()
+
+# Answer many questions at once, in input order. Retrieval for the whole
+# batch is one embeddings request and one FAISS search; the chat calls then
+# fan out with at most max_concurrency in flight over one shared connection
+# pool. Repeated questions are answered once; a failed answer comes back
+# as None.
+async def answer_many(queries, max_concurrency=BATCH_CONCURRENCY):
+    retriever = get_retrieval_backend()
+    data_hash = retriever.data_hash
+    keys = [(normalize_query(q), data_hash) for q in queries]
+    answers = [answer_cache.get(key) for key in keys]
+    count("rag_engine.requests", len(queries))
+    count("rag_engine.cached_answers", sum(a is not None for a in answers))
+
+    first = {}
+    for i, (key, answer) in enumerate(zip(keys, answers)):
+        if answer is None:
+            first.setdefault(key, i)
+    if not first:
+        return answers
+
+    todo = list(first.values())
+    with span("rag_engine.batch_retrieve"):
+        contexts = await asyncio.to_thread(retriever.search_many, [queries[i] for i in todo],
+                                           CONTEXT_CANDIDATES)
+    semaphore = asyncio.Semaphore(max_concurrency)
+    async with new_async_client() as client:
+        generated = await asyncio.gather(
+            *(_generate(client, semaphore, queries[i], context) for i, context in zip(todo, contexts)),
+            return_exceptions=True,
+        )
+
+    fresh = {}
+    for i, answer in zip(todo, generated):
+        if isinstance(answer, Exception):
+            print(f"[ERROR] Answer failed for {queries[i]!r}: {answer}")
+            continue
+        answer_cache.set(keys[i], answer)
+        fresh[keys[i]] = answer
+    return [fresh.get(key) if answer is None else answer for key, answer in zip(keys, answers)]
+
+def answer_many_sync(queries, max_concurrency=BATCH_CONCURRENCY):
+    return asyncio.run(answer_many(queries, max_concurrency))
@@ -1,50 +1,33 @@
 import streamlit as st
-from sentence_transformers import SentenceTransformer, util
-import pandas as pd
-import torch
+from sentence_transformers import SentenceTransformer
 import random
 import re
-from symspellpy.symspellpy import SymSpell, Verbosity
 import pkg_resources
-import json
-import openai
-import os
-import hashlib
 import uuid  # ✅ Added for unique key generation
-
-# --- API Key Setup ---
-openai.api_key = os.getenv("OPENAI_API_KEY")
+import time
+from utils.embedding_cache import encode_with_cache
+from utils.cache import get_cache, normalize_query
+from utils.semantic_cache import get_semantic_cache
+from utils.lexicon import DEPARTMENT_MAP as department_map, COURSE_CODE_RE, course_code
+from utils.normalizer import shorthand_expander
+from utils.spelling import SpellCorrector, build_domain_vocabulary, load_sym_spell
+from utils.registry import resource
+from utils.filter_index import MetadataIndex, mask_key, mask_to_json, masked_top_k, normalize_rows, cosine_scores
+from utils.vector_store import open_store
+from utils.record_store import load_records
+from utils.hybrid import BM25Index, CourseCodeIndex, reciprocal_rank_fusion
+from utils.llm import stream_chat
+from utils.metrics import span, count, start_exporters
+from utils import retrieval_client
 
 # --- SymSpell Setup ---
-sym_spell = SymSpell(max_dictionary_edit_distance=2, prefix_length=7)
-dictionary_path = pkg_resources.resource_filename("symspellpy", "frequency_dictionary_en_82_765.txt")
-sym_spell.load_dictionary(dictionary_path, term_index=0, count_index=1)
-
-# --- Abbreviations and Department Mapping ---
-abbreviations = {
-    "u": "you", "r": "are", "ur": "your", "ow": "how", "pls": "please", "plz": "please",
-    "tmrw": "tomorrow", "cn": "can", "wat": "what", "cud": "could", "shud": "should",
-    "wud": "would", "abt": "about", "bcz": "because", "btw": "between", "asap": "as soon as possible",
-    "idk": "i don't know", "imo": "in my opinion", "msg": "message", "doc": "document", "d": "the",
-    "yr": "year", "sem": "semester", "dept": "department", "admsn": "admission",
-    "cresnt": "crescent", "uni": "university", "clg": "college", "sch": "school",
-    "info": "information", "l": "level", "CSC": "Computer Science", "ECO": "Economics with Operations Research",
-    "PHY": "Physics", "STAT": "Statistics", "1st": "First", "2nd": "Second"
-}
-
-department_map = {
-    "GST": "General Studies", "MTH": "Mathematics", "PHY": "Physics", "STA": "Statistics",
-    "COS": "Computer Science", "CUAB-CSC": "Computer Science", "CSC": "Computer Science",
-    "IFT": "Computer Science", "SEN": "Software Engineering", "ENT": "Entrepreneurship",
-    "CYB": "Cybersecurity", "ICT": "Information and Communication Technology",
-    "DTS": "Data Science", "CUAB-CPS": "Computer Science", "CUAB-ECO": "Economics with Operations Research",
-    "ECO": "Economics with Operations Research", "SSC": "Social Sciences", "CUAB-BCO": "Economics with Operations Research",
-    "LIB": "Library Studies", "LAW": "Law (BACOLAW)", "GNS": "General Studies", "ENG": "English",
-    "SOS": "Sociology", "PIS": "Political Science", "CPS": "Computer Science",
-    "LPI": "Law (BACOLAW)", "ICL": "Law (BACOLAW)", "LPB": "Law (BACOLAW)", "TPT": "Law (BACOLAW)",
-    "FAC": "Agricultural Sciences", "ANA": "Anatomy", "BIO": "Biological Sciences",
-    "CHM": "Chemical Sciences", "CUAB-BCH": "Biochemistry", "CUAB": "Crescent University - General"
-}
+# Loaded once per process, not on every rerun. Skips course codes and other
+# domain words, memoizes the rest.
+@resource("rags.dictionary_load")
+def get_spell_corrector():
+    dictionary_path = pkg_resources.resource_filename("symspellpy", "frequency_dictionary_en_82_765.txt")
+    sym_spell = load_sym_spell(dictionary_path, max_edit_distance=2, prefix_length=7)
+    return SpellCorrector(sym_spell, build_domain_vocabulary(), name="rags.spelling")
 
 # --- Text Preprocessing ---
 def normalize_text(text):
@@ -54,57 +37,59 @@ def normalize_text(text):
 
 def preprocess_text(text):
     text = normalize_text(text)
-    words = text.split()
-    expanded = [abbreviations.get(word.lower(), word) for word in words]
-    corrected = []
-    for word in expanded:
-        suggestions = sym_spell.lookup(word, Verbosity.CLOSEST, max_edit_distance=2)
-        corrected.append(suggestions[0].term if suggestions else word)
-    return ' '.join(corrected)
+    expanded = shorthand_expander.expand_words(text.split())
+    with span("rags.symspell"):
+        return ' '.join(get_spell_corrector().correct_words(expanded))
 
 def extract_prefix(code):
     match = re.match(r"([A-Z\-]+)", code)
     return match.group(1) if match else None
 
 # --- Model & Data Load ---
+MODEL_NAME = 'all-MiniLM-L6-v2'
+
 @st.cache_resource
 def load_model():
-    return SentenceTransformer('all-MiniLM-L6-v2')
+    return SentenceTransformer(MODEL_NAME)
 
-@st.cache_data
+FILTER_FIELDS = ("faculty", "department", "level", "semester")
+
+# Columnar record store (utils/record_store.py): one shared read-only copy,
+# row i lines up with row i of the embedding, BM25 and filter indexes
+@st.cache_resource
 def load_data():
-    with open("qa_dataset.json", "r", encoding="utf-8") as f:
-        raw_data = json.load(f)
-
-    rag_data = []
-    for entry in raw_data:
-        question = entry.get("question", "").strip()
-        answer = entry.get("answer", "").strip()
-        department = entry.get("department", "").strip()
-        level = entry.get("level", "").strip()
-        semester = entry.get("semester", "").strip()
-        faculty = entry.get("faculty", "").strip()
-
-        if question and answer:
-            rag_data.append({
-                "text": f"Q: {question}\nA: {answer}",
-                "question": question,
-                "answer": answer,
-                "department": department,
-                "level": level,
-                "semester": semester,
-                "faculty": faculty
-            })
-
-    return pd.DataFrame(rag_data)
-
-@st.cache_data
-def compute_question_embeddings(questions: list):
-    model = load_model()
-    return model.encode(questions, convert_to_tensor=True)
+    return load_records("qa_dataset.json", FILTER_FIELDS)
+
+# Question embeddings for the whole dataset plus per-field row bitmaps, built
+# once. Filtering selects rows instead of re-encoding a filtered subset. The
+# normalized embeddings live in a compact memory-mapped store
+# (EMBEDDING_STORE_FORMAT) shared read-only by every worker process.
+@st.cache_resource
+def load_search_index():
+    dataset = load_data()
+    questions = dataset.questions
+    embeddings = open_store(f"rags-{MODEL_NAME}", questions, lambda: normalize_rows(
+        encode_with_cache(questions, MODEL_NAME, lambda batch: load_model().encode(batch))))
+    return embeddings, load_metadata_index()
+
+# Sparse side of the hybrid search over the same "Q: ...\nA: ..." texts
+@st.cache_resource
+def load_sparse_index():
+    dataset = load_data()
+    return BM25Index(dataset.texts), CourseCodeIndex(dataset.texts, questions=dataset.questions)
+
+# --- Query caches (process-wide, shared by all sessions) ---
+preprocess_cache = get_cache("rags.preprocess")
+query_embedding_cache = get_cache("rags.query_embedding")
+search_cache = get_cache("rags.search")
+answer_cache = get_cache("rags.answer")
+# GPT fallback replies, also served to close paraphrases of a cached query
+fallback_cache = get_semantic_cache("rags.fallback")
 
 # --- OpenAI fallback ---
-def fallback_openai(user_input, context_qa=None):
+SERVER_ERROR_REPLY = "Sorry, I couldn't reach the server. Try again later."
+
+def fallback_messages(user_input, context_qa=None):
     system_prompt = (
         "You are a helpful assistant specialized in Crescent University information. "
         "If you don't know an answer, politely say so and refer to university resources."
@@ -118,195 +103,320 @@ def fallback_openai(user_input, context_qa=None):
         user_message = user_input
 
     messages.append({"role": "user", "content": user_message})
+    return messages
 
+# Yields the reply as it streams in. on_complete(reply) only runs when the
+# whole reply arrived, so server errors never reach the answer cache.
+def stream_fallback_openai(user_input, context_qa=None, on_complete=None):
+    started = False
     try:
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=messages,
-            temperature=0.3
-        )
-        return response.choices[0].message["content"].strip()
+        with span("rags.fallback_openai"):
+            for piece in stream_chat(fallback_messages(user_input, context_qa), model="gpt-3.5-turbo",
+                                     on_complete=on_complete, temperature=0.3):
+                started = True
+                yield piece
     except Exception:
-        return "Sorry, I couldn't reach the server. Try again later."
-
-# --- Response Finder ---
-def find_response(user_input, dataset, embeddings, threshold=0.4):
-    model = load_model()
-    user_input_clean = preprocess_text(user_input)
-
-    if embeddings is None or len(dataset) == 0:
-        return "No matching data found for your filters.", None, 0.0, []
+        count("rags.fallback_errors")
+        if not started:
+            yield SERVER_ERROR_REPLY
 
-    greetings = ["hi", "hello", "hey", "hi there", "greetings", "how are you",
-                 "how are you doing", "how's it going", "can we talk?",
-                 "can we have a conversation?", "okay", "i'm fine", "i am fine"]
-    if user_input_clean.lower() in greetings:
-        return random.choice(["Hello!", "Hi there!", "Hey!", "Greetings!","I'm doing well, thank you!", 
-                              "Sure pal", "I'm fine, thank you", "Hi! How can I help you?", 
-                              "Hello! Ask me anything about Crescent University."]), None, 1.0, []
-
-    user_embedding = model.encode(user_input_clean, convert_to_tensor=True)
-    cos_scores = util.pytorch_cos_sim(user_embedding, embeddings)[0]
-    top_scores, top_indices = torch.topk(cos_scores, k=5)
-
-    top_score = top_scores[0].item()
-    top_index = top_indices[0].item()
+def fallback_openai(user_input, context_qa=None):
+    return "".join(stream_fallback_openai(user_input, context_qa)).strip()
+
+# Dense and BM25 candidates fused by reciprocal rank; scores are the cosine
+# similarity of each returned row. Fusion can rank a row that is moderate in
+# both lists above the dense #1, so when the fused top row falls below
+# threshold but the dense #1 clears it, the dense #1 leads instead. The top
+# score is then below threshold exactly when pure dense retrieval's would be,
+# and the GPT fallback fires no more often than without BM25.
+FUSION_CANDIDATES = 20
+
+def hybrid_top_k(query_text, query_embedding, embeddings, mask=None, k=5, threshold=0.4):
+    bm25_index, _ = load_sparse_index()
+    dense_scores, dense_rows = masked_top_k(query_embedding, embeddings, mask, k=FUSION_CANDIDATES)
+    _, sparse_rows = bm25_index.top_k(query_text, FUSION_CANDIDATES, mask)
+    rows = reciprocal_rank_fusion([dense_rows, sparse_rows])[:k]
+    scores = cosine_scores(query_embedding, embeddings, rows)
+    if dense_rows and scores[0] < threshold <= dense_scores[0]:
+        rows = [dense_rows[0]] + [row for row in rows if row != dense_rows[0]][:k - 1]
+        scores = cosine_scores(query_embedding, embeddings, rows)
+    return scores, rows
+
+# --- Query encoding ---
+# retrieval_server.py swaps in a micro-batched encoder shared by all sessions
+_encode_query = None
+
+def use_query_encoder(encode_fn):
+    global _encode_query
+    _encode_query = encode_fn
+
+def encode_query(text):
+    return _encode_query(text) if _encode_query else load_model().encode(text)
 
-    if top_score < threshold:
+# --- Response Finder ---
+# embeddings cover the whole dataset; mask (from apply_filters) selects the
+# rows the sidebar filters allow, None meaning all of them. With stream=True
+# an uncached GPT fallback comes back as a generator of reply pieces.
+# Retrieval runs here, or in the shared retrieval_server.py when
+# RETRIEVAL_SERVER is set (embeddings may then be None); a GPT fallback is
+# always generated here so it streams straight to the UI.
+def find_response(user_input, dataset, embeddings, threshold=0.4, mask=None, stream=False):
+    count("rags.responses")
+    with span("rags.find_response"):
+        if retrieval_client.enabled():
+            result = retrieval_client.get_client().post("/rags/retrieve", {
+                "query": user_input, "threshold": threshold, "mask": mask_to_json(mask)})
+        else:
+            result = retrieve_response(user_input, dataset, embeddings, threshold, mask)
+
+    reply = result["reply"]
+    if reply is None:
+        started = time.perf_counter()
+        context_qa = result["context"]
+
+        def remember(text):
+            remember_fallback(result["query_key"], context_qa, text.strip(), time.perf_counter() - started)
+
+        reply = stream_fallback_openai(user_input, context_qa, on_complete=remember)
+        if not stream:
+            reply = "".join(reply).strip()
+    return reply, result["department"], result["score"], result["related"]
+
+def _result(reply, score, department=None, related=(), **fallback):
+    return {"reply": reply, "score": score, "department": department, "related": list(related), **fallback}
+
+# Retrieval half of find_response, as a JSON-ready dict. reply is None when
+# the best match scores below threshold and no cached GPT reply fits; context
+# and query_key then describe the fallback to generate.
+def retrieve_response(user_input, dataset, embeddings, threshold=0.4, mask=None):
+    if embeddings is None or len(dataset) == 0 or (mask is not None and not mask.any()):
+        return _result("No matching data found for your filters.", 0.0)
+
+    # Exact course codes resolve from the hash map, skipping spell checking
+    # and the embedding call
+    _, course_code_index = load_sparse_index()
+    with span("rags.code_lookup"):
+        code_rows = course_code_index.lookup(user_input, mask)
+    if code_rows:
+        count("rags.code_lookups")
+        top_indices = code_rows[:5]
+        top_scores = [1.0] * len(top_indices)
+    else:
+        with span("rags.preprocess"):
+            user_input_clean = preprocess_cache.get_or_set(normalize_query(user_input),
+                                                           lambda: preprocess_text(user_input))
+
+        greetings = ["hi", "hello", "hey", "hi there", "greetings", "how are you",
+                     "how are you doing", "how's it going", "can we talk?",
+                     "can we have a conversation?", "okay", "i'm fine", "i am fine"]
+        if user_input_clean.lower() in greetings:
+            count("rags.greetings")
+            return _result(random.choice(["Hello!", "Hi there!", "Hey!", "Greetings!","I'm doing well, thank you!", 
+                                          "Sure pal", "I'm fine, thank you", "Hi! How can I help you?", 
+                                          "Hello! Ask me anything about Crescent University."]), 1.0)
+
+        query_key = normalize_query(user_input_clean)
+        with span("rags.encode"):
+            user_embedding = query_embedding_cache.get_or_set(
+                query_key, lambda: encode_query(user_input_clean))
+        # Results depend on which rows the filters left in
+        search_key = (query_key, mask_key(mask), threshold)
+        with span("rags.search"):
+            top_scores, top_indices = search_cache.get_or_set(
+                search_key, lambda: hybrid_top_k(user_input_clean, user_embedding, embeddings, mask, 5, threshold))
+
+    top_score = top_scores[0]
+    top_index = top_indices[0]
+
+    # A course-code hit is an exact match and is answered as is, whatever
+    # the threshold; the semantic fallback needs the query embedding, which
+    # that path never computes
+    if top_score < threshold and not code_rows:
+        count("rags.fallbacks")
         context_qa = {
-            "question": dataset.iloc[top_index]["question"],
-            "answer": dataset.iloc[top_index]["answer"]
+            "question": dataset.questions[top_index],
+            "answer": dataset.answers[top_index]
         }
-        gpt_reply = fallback_openai(user_input, context_qa)
-        return gpt_reply, None, top_score, []
-
-    response = dataset.iloc[top_index]["answer"]
-    question = dataset.iloc[top_index]["question"]
-    related_questions = [dataset.iloc[i.item()]["question"] for i in top_indices[1:]]
-
-    match = re.search(r"\b([A-Z]{2,}-?\d{3,})\b", question)
+        gpt_reply = answer_cache.get((query_key, context_qa["question"]))
+        if gpt_reply is None:
+            gpt_reply = fallback_cache.get(user_embedding, context=context_qa["question"])
+            if gpt_reply is not None:
+                count("rags.semantic_cache_hits")
+        return _result(gpt_reply, top_score, context=context_qa, query_key=query_key)
+
+    with span("rags.lookup"):
+        response = dataset.answers[top_index]
+        question = dataset.questions[top_index]
+        related_questions = [dataset.questions[i] for i in top_indices[1:]]
+
+    match = COURSE_CODE_RE.search(question)
     department = None
     if match:
-        code = match.group(1)
+        code = course_code(*match.groups())
         prefix = extract_prefix(code)
         department = department_map.get(prefix, "Unknown")
 
     if random.random() < 0.2:
         response = random.choice(["I think ", "Maybe: ", "Possibly: ", "Here's what I found: "]) + response
 
-    return response, department, top_score, related_questions
+    return _result(response, top_score, department, related_questions)
+
+# Cache a finished GPT fallback reply (in the retrieval server when there is one)
+def remember_fallback(query_key, context_qa, reply, latency):
+    if retrieval_client.enabled():
+        try:
+            retrieval_client.get_client().post("/rags/remember", {
+                "query_key": query_key, "context": context_qa, "reply": reply, "latency": latency})
+        except (OSError, RuntimeError) as e:
+            print(f"[WARN] Could not cache fallback reply on the retrieval server: {e}")
+        return
+    answer_cache.set((query_key, context_qa["question"]), reply)
+    user_embedding = query_embedding_cache.get(query_key)
+    if user_embedding is not None:
+        fallback_cache.set(user_embedding, reply, context=context_qa["question"], latency=latency)
 
-# --- Streamlit UI ---
-st.set_page_config(page_title="Crescent University Chatbot", page_icon="🎓")
+# --- Apply filters ---
+# Per-field row bitmaps over the dataset; small enough to build in every
+# worker, thin clients included
+@st.cache_resource
+def load_metadata_index():
+    dataset = load_data()
+    return MetadataIndex({field: dataset.column(field) for field in FILTER_FIELDS})
 
-model = load_model()
-dataset = load_data()
-question_list = dataset['question'].tolist()
-question_embeddings = compute_question_embeddings(question_list)
+# Returns a boolean row mask over dataset, or None when no filter is set
+def apply_filters(faculty, department, level, semester):
+    return load_metadata_index().mask(faculty=faculty, department=department, level=level, semester=semester)
 
-# --- Apply filters ---
-def apply_filters(df, faculty, department, level, semester):
-    filtered_df = df.copy()
-    if faculty:
-        filtered_df = filtered_df[filtered_df['faculty'].isin(faculty)]
-    if department:
-        filtered_df = filtered_df[filtered_df['department'].isin(department)]
-    if level:
-        filtered_df = filtered_df[filtered_df['level'].isin(level)]
-    if semester:
-        filtered_df = filtered_df[filtered_df['semester'].isin(semester)]
-    return filtered_df
-
-# --- Sidebar Filters ---
-with st.sidebar:
-    st.header("Filter Questions")
-    faculty_options = sorted(dataset['faculty'].dropna().unique())
-    department_options = sorted(dataset['department'].dropna().unique())
-    level_options = sorted(dataset['level'].dropna().unique())
-    semester_options = sorted(dataset['semester'].dropna().unique())
-
-    selected_faculty = st.multiselect("Faculty", faculty_options)
-    selected_department = st.multiselect("Department", department_options)
-    selected_level = st.multiselect("Level", level_options)
-    selected_semester = st.multiselect("Semester", semester_options)
-
-filtered_dataset = apply_filters(dataset, selected_faculty, selected_department, selected_level, selected_semester)
-
-if filtered_dataset.empty:
-    st.warning("No questions found for the selected filters. Please adjust your filter selection.")
-    question_embeddings = None
-else:
-    question_list = filtered_dataset['question'].tolist()
-    question_embeddings = compute_question_embeddings(question_list)
-
-# --- Sidebar ---
-with st.sidebar:
-    if st.button("🧹 Clear Chat"):
-        st.session_state.chat_history = []
-        st.session_state.related_questions = []
-        st.session_state.last_department = None
+# --- Streamlit UI ---
+# Streamlit runs this file as __main__; importing it (e.g. from the
+# benchmarks) only defines the functions above.
+def main():
+    st.set_page_config(page_title="Crescent University Chatbot", page_icon="🎓")
+    start_exporters()
+
+    # Thin client: the retrieval server holds the model and embeddings
+    dataset = load_data()
+    metadata_index = load_metadata_index()
+    question_embeddings = None if retrieval_client.enabled() else load_search_index()[0]
+
+    # --- Sidebar Filters ---
+    with st.sidebar:
+        st.header("Filter Questions")
+        faculty_options = metadata_index.options('faculty')
+        department_options = metadata_index.options('department')
+        level_options = metadata_index.options('level')
+        semester_options = metadata_index.options('semester')
+
+        selected_faculty = st.multiselect("Faculty", faculty_options)
+        selected_department = st.multiselect("Department", department_options)
+        selected_level = st.multiselect("Level", level_options)
+        selected_semester = st.multiselect("Semester", semester_options)
+
+    row_mask = apply_filters(selected_faculty, selected_department, selected_level, selected_semester)
+
+    if row_mask is not None and not row_mask.any():
+        st.warning("No questions found for the selected filters. Please adjust your filter selection.")
+
+    # --- Sidebar ---
+    with st.sidebar:
+        if st.button("🧹 Clear Chat"):
+            st.session_state.chat_history = []
+            st.session_state.related_questions = []
+            st.session_state.last_department = None
+            st.rerun()
+
+    # --- Title and Styles ---
+    st.markdown("""
+    <style>
+        html, body, .stApp { font-family: 'Open Sans', sans-serif; }
+        h1, h2, h3, h4, h5 { font-family: 'Merriweather', serif; color: #004080; }
+        .chat-message-user {
+            background-color: #d6eaff;
+            padding: 12px;
+            border-radius: 15px;
+            margin-bottom: 10px;
+            margin-left: auto;
+            max-width: 75%;
+            font-weight: 550;
+            color: #000;
+        }
+        .chat-message-assistant {
+            background-color: #f5f5f5;
+            padding: 12px;
+            border-radius: 15px;
+            margin-bottom: 10px;
+            margin-right: auto;
+            max-width: 75%;
+            font-weight: 600;
+            color: #000;
+        }
+        .related-question {
+            background-color: #e6f2ff;
+            padding: 8px 12px;
+            margin: 6px 6px 6px 0;
+            display: inline-block;
+            border-radius: 10px;
+            font-size: 0.9rem;
+            cursor: pointer;
+        }
+        .department-label {
+            font-family: 'Merriweather', serif;
+            font-size: 0.85rem;
+            color: #004080;
+            font-style: italic;
+        }
+    </style>
+    """, unsafe_allow_html=True)
+
+    st.title("🎓 Crescent University Chatbot")
+
+    # --- Chat Render ---
+    for message in st.session_state.chat_history:
+        role_class = "chat-message-user" if message["role"] == "user" else "chat-message-assistant"
+        with st.chat_message(message["role"]):
+            st.markdown(f'<div class="{role_class}">{message["content"]}</div>', unsafe_allow_html=True)
+            if message["role"] == "assistant" and st.session_state.last_department:
+                st.markdown(f'<div class="department-label">Department: {st.session_state.last_department}</div>', unsafe_allow_html=True)
+
+    # --- Input ---
+    prompt = st.chat_input("Ask me anything about Crescent University...")
+
+    if prompt:
+        st.session_state.chat_history.append({"role": "user", "content": prompt})
+        # Exact questions (among the filtered rows) come straight from the hash map
+        matched_row = dataset.find_exact(prompt, row_mask)
+        if matched_row is not None:
+            answer = dataset.answers[matched_row]
+            department = None
+            related = []
+        else:
+            answer, department, score, related = find_response(prompt, dataset, question_embeddings,
+                                                                mask=row_mask, stream=True)
+            if not isinstance(answer, str):
+                # GPT fallback: show the reply while it streams in
+                with st.chat_message("user"):
+                    st.markdown(f'<div class="chat-message-user">{prompt}</div>', unsafe_allow_html=True)
+                with st.chat_message("assistant"):
+                    answer = st.write_stream(answer).strip()
+
+        st.session_state.chat_history.append({"role": "assistant", "content": answer})
+        st.session_state.related_questions = related
+        st.session_state.last_department = department
         st.rerun()
 
-# --- Title and Styles ---
-st.markdown("""
-<style>
-    html, body, .stApp { font-family: 'Open Sans', sans-serif; }
-    h1, h2, h3, h4, h5 { font-family: 'Merriweather', serif; color: #004080; }
-    .chat-message-user {
-        background-color: #d6eaff;
-        padding: 12px;
-        border-radius: 15px;
-        margin-bottom: 10px;
-        margin-left: auto;
-        max-width: 75%;
-        font-weight: 550;
-        color: #000;
-    }
-    .chat-message-assistant {
-        background-color: #f5f5f5;
-        padding: 12px;
-        border-radius: 15px;
-        margin-bottom: 10px;
-        margin-right: auto;
-        max-width: 75%;
-        font-weight: 600;
-        color: #000;
-    }
-    .related-question {
-        background-color: #e6f2ff;
-        padding: 8px 12px;
-        margin: 6px 6px 6px 0;
-        display: inline-block;
-        border-radius: 10px;
-        font-size: 0.9rem;
-        cursor: pointer;
-    }
-    .department-label {
-        font-family: 'Merriweather', serif;
-        font-size: 0.85rem;
-        color: #004080;
-        font-style: italic;
-    }
-</style>
-""", unsafe_allow_html=True)
-
-st.title("🎓 Crescent University Chatbot")
-
-# --- Chat Render ---
-for message in st.session_state.chat_history:
-    role_class = "chat-message-user" if message["role"] == "user" else "chat-message-assistant"
-    with st.chat_message(message["role"]):
-        st.markdown(f'<div class="{role_class}">{message["content"]}</div>', unsafe_allow_html=True)
-        if message["role"] == "assistant" and st.session_state.last_department:
-            st.markdown(f'<div class="department-label">Department: {st.session_state.last_department}</div>', unsafe_allow_html=True)
-
-# --- Input ---
-prompt = st.chat_input("Ask me anything about Crescent University...")
-
-if prompt:
-    st.session_state.chat_history.append({"role": "user", "content": prompt})
-    matched_row = filtered_dataset[filtered_dataset['question'].str.lower() == prompt.lower()]
-    if not matched_row.empty:
-        answer = matched_row.iloc[0]['answer']
-        department = None
-        related = []
-    else:
-        answer, department, score, related = find_response(prompt, filtered_dataset, question_embeddings)
-
-    st.session_state.chat_history.append({"role": "assistant", "content": answer})
-    st.session_state.related_questions = related
-    st.session_state.last_department = department
-    st.rerun()
-
-# --- Related Suggestions ---
-if st.session_state.related_questions:
-    st.markdown("#### 💡 You might also ask:")
-    for q in st.session_state.related_questions:
-        unique_key = f"{uuid.uuid4().hex}"
-        if st.button(q, key=f"related_{unique_key}", use_container_width=True):
-            st.session_state.chat_history.append({"role": "user", "content": q})
-            answer, department, score, related = find_response(q, filtered_dataset, question_embeddings)
-            st.session_state.chat_history.append({"role": "assistant", "content": answer})
-            st.session_state.related_questions = related
-            st.session_state.last_department = department
-            st.rerun()
+    # --- Related Suggestions ---
+    if st.session_state.related_questions:
+        st.markdown("#### 💡 You might also ask:")
+        for q in st.session_state.related_questions:
+            unique_key = f"{uuid.uuid4().hex}"
+            if st.button(q, key=f"related_{unique_key}", use_container_width=True):
+                st.session_state.chat_history.append({"role": "user", "content": q})
+                answer, department, score, related = find_response(q, dataset, question_embeddings, mask=row_mask)
+                st.session_state.chat_history.append({"role": "assistant", "content": answer})
+                st.session_state.related_questions = related
+                st.session_state.last_department = department
+                st.rerun()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+# Shared retrieval backend for the Streamlit apps. One process owns the
+# models, indexes and query caches; any number of UI workers started with
+# RETRIEVAL_SERVER pointing here stay thin clients (utils/retrieval_client.py)
+# and only generate GPT replies themselves, so those still stream.
+#
+#   python retrieval_server.py --port 8600
+#   RETRIEVAL_SERVER=http://127.0.0.1:8600 streamlit run app.py
+#
+#   python retrieval_server.py --socket /tmp/chatbot-retrieval.sock --apps rags
+#   RETRIEVAL_SERVER=unix:///tmp/chatbot-retrieval.sock streamlit run rags.py
+#
+# Concurrent requests are micro-batched (utils/batching.py): rag_engine
+# searches share one embeddings call and one FAISS search, rags queries one
+# SentenceTransformer forward pass.
+
+import os
+import json
+import argparse
+import socketserver
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from utils.batching import MicroBatcher
+from utils.filter_index import mask_from_json
+from utils.metrics import span, start_exporters
+from utils import retrieval_client
+
+BATCH_SIZE = int(os.getenv("RETRIEVAL_BATCH_SIZE", "64"))
+# Extra time a batch waits for more requests; 0 batches whatever has queued
+BATCH_WAIT = float(os.getenv("RETRIEVAL_BATCH_WAIT_MS", "0")) / 1000
+
+
+# --- Request fields ---
+class BadRequest(ValueError):
+    pass
+
+_REQUIRED = object()
+
+# payload[name], converted with cast; a missing or malformed field is the
+# client's error (HTTP 400), not the backend's
+def field(payload, name, cast=None, default=_REQUIRED):
+    if name not in payload:
+        if default is _REQUIRED:
+            raise BadRequest(f"missing field {name!r}")
+        return default
+    try:
+        return cast(payload[name]) if cast else payload[name]
+    except (TypeError, ValueError, KeyError):
+        raise BadRequest(f"invalid field {name!r}")
+
+
+# --- Backends ---
+class RagEngineBackend:
+    def __init__(self):
+        import rag_engine
+        self.retriever = rag_engine.get_retriever()
+        self.batcher = MicroBatcher(self._search_batch, BATCH_SIZE, BATCH_WAIT, name="retrieval_server.rag_engine")
+
+    # items: (query, top_k); one search_many per distinct top_k
+    def _search_batch(self, items):
+        by_top_k = defaultdict(list)
+        for i, (_, top_k) in enumerate(items):
+            by_top_k[top_k].append(i)
+        results = [None] * len(items)
+        for top_k, positions in by_top_k.items():
+            found = self.retriever.search_many([items[i][0] for i in positions], top_k)
+            for i, chunks in zip(positions, found):
+                results[i] = chunks
+        return results
+
+    def info(self, payload):
+        return {"data_hash": self.retriever.data_hash}
+
+    def search(self, payload):
+        chunks = self.batcher.submit((field(payload, "query", str), field(payload, "top_k", int, 3)))
+        return {"chunks": chunks, "data_hash": self.retriever.data_hash}
+
+    def search_many(self, payload):
+        queries = [str(q) for q in field(payload, "queries", list)]
+        results = self.retriever.search_many(queries, field(payload, "top_k", int, 3))
+        return {"results": results, "data_hash": self.retriever.data_hash}
+
+class RagsBackend:
+    def __init__(self):
+        import rags
+        self.rags = rags
+        self.dataset = rags.load_data()
+        self.embeddings, _ = rags.load_search_index()
+        rags.load_sparse_index()
+        rags.get_spell_corrector()
+        model = rags.load_model()
+        batcher = MicroBatcher(lambda texts: list(model.encode(texts)), BATCH_SIZE, BATCH_WAIT,
+                               name="retrieval_server.rags_encode")
+        rags.use_query_encoder(batcher.submit)
+
+    def retrieve(self, payload):
+        return self.rags.retrieve_response(field(payload, "query", str), self.dataset, self.embeddings,
+                                           field(payload, "threshold", float, 0.4),
+                                           field(payload, "mask", mask_from_json, None))
+
+    def remember(self, payload):
+        self.rags.remember_fallback(field(payload, "query_key", str), field(payload, "context", dict),
+                                    field(payload, "reply", str), field(payload, "latency", float, 0.0))
+        return {"ok": True}
+
+BACKENDS = {"rag_engine": RagEngineBackend, "rags": RagsBackend}
+
+
+# --- HTTP ---
+class RetrievalHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self):
+        try:
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            payload = json.loads(body or b"{}")
+        except ValueError as e:
+            raise BadRequest(f"invalid JSON: {e}")
+        if not isinstance(payload, dict):
+            raise BadRequest("body must be a JSON object")
+        return payload
+
+    def _route(self, method):
+        if method == "GET" and self.path == "/health":
+            self._send_json(200, {"ok": True, "apps": sorted(self.server.backends)})
+            return
+        app, _, action = self.path.strip("/").partition("/")
+        backend = self.server.backends.get(app)
+        handler = getattr(backend, action, None) if backend and not action.startswith("_") else None
+        if handler is None:
+            self._send_json(404, {"error": f"Unknown path {self.path}"})
+            return
+        try:
+            payload = {}
+            if method == "POST":
+                payload = self._read_json()
+            with span(f"retrieval_server.{app}.{action}"):
+                result = handler(payload)
+        except BadRequest as e:
+            self._send_json(400, {"error": f"Bad request: {e}"})
+            return
+        except Exception as e:
+            print(f"[ERROR] {self.path} failed: {e}")
+            self._send_json(500, {"error": str(e)})
+            return
+        self._send_json(200, result)
+
+    def do_GET(self):
+        self._route("GET")
+
+    def do_POST(self):
+        self._route("POST")
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def get_request(self):
+        # BaseHTTPRequestHandler expects a (host, port) client address
+        request, _ = super().get_request()
+        return request, ("unix", 0)
+
+def make_server(backends, port=8600, host="127.0.0.1", socket_path=None):
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        server = ThreadingUnixHTTPServer(socket_path, RetrievalHandler)
+    else:
+        server = ThreadingHTTPServer((host, port), RetrievalHandler)
+        server.daemon_threads = True
+    server.backends = backends
+    return server
+
+def load_backends(apps):
+    backends = {}
+    for app in apps:
+        print(f"[INFO] Loading {app}...")
+        backends[app] = BACKENDS[app]()
+    return backends
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared retrieval server for the chat apps")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--socket", help="serve on this Unix socket instead of TCP")
+    parser.add_argument("--apps", default=",".join(BACKENDS), help="backends to load")
+    args = parser.parse_args()
+
+    # The server retrieves in-process even if RETRIEVAL_SERVER is set in its environment
+    retrieval_client.RETRIEVAL_SERVER = ""
+    backends = load_backends([app for app in args.apps.split(",") if app])
+    start_exporters()
+    server = make_server(backends, args.port, args.host, args.socket)
+    where = f"unix://{args.socket}" if args.socket else f"http://{args.host}:{args.port}"
+    print(f"[INFO] Retrieval server ({', '.join(backends)}) at {where}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if args.socket and os.path.exists(args.socket):
+            os.remove(args.socket)
+
+
+if __name__ == "__main__":
+    main()
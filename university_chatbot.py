@@ -1,106 +1,72 @@
 # university_chatbot_app.py
 
+import time
+_import_started = time.perf_counter()
+
 import streamlit as st
-import os
 import json
 import faiss
 import numpy as np
-from sentence_transformers import SentenceTransformer, util
-import openai
 from textblob import TextBlob
-from symspellpy import SymSpell
 from pathlib import Path
-import re
 from dotenv import load_dotenv
+from utils.embedding_cache import encode_with_cache
+from utils.cache import get_cache, normalize_query
+from utils.semantic_cache import get_semantic_cache
+from utils.normalizer import query_normalizer
+from utils.spelling import SpellCorrector, build_domain_vocabulary, load_sym_spell
+from utils.registry import resource, record_timing, format_startup_report
+from utils.llm import stream_chat, stream_metrics
+from utils.metrics import span, count, start_exporters
+record_timing("university_chatbot.imports", time.perf_counter() - _import_started)
 
 # Load environment variables
 load_dotenv()
 
-# Set OpenAI API Key
-openai.api_key = os.getenv("OPENAI_API_KEY")
-
-# Load SentenceTransformer model
-embed_model = SentenceTransformer("all-MiniLM-L6-v2")
-
-# Load knowledge base
-with open("qa_dataset.json", "r", encoding="utf-8") as f:
-    qa_data = json.load(f)
-
-# Precompute embeddings
-questions = [item["question"] for item in qa_data]
-question_embeddings = embed_model.encode(questions, convert_to_tensor=True).cpu().numpy()
-
-# Build FAISS index
-index = faiss.IndexFlatL2(question_embeddings.shape[1])
-index.add(question_embeddings)
-
-# Load SymSpell
-sym_spell = SymSpell(max_dictionary_edit_distance=2, prefix_length=7)
-dictionary_path = Path("frequency_dictionary_en_82_765.txt")
-sym_spell.load_dictionary(dictionary_path, 0, 1)
-
-# Abbreviations, Synonyms, Plurals
-ABBREVIATIONS = {
-    "siwes": "student industrial work experience scheme",
-    "dept": "department",
-    "dept.": "department",
-    "cuab": "crescent university",
-    "ict": "information and communication technology",
-    "cohes": "college of health sciences",
-    "coes": "college of environmental sciences",
-    "conas": "college of natural and applied sciences",
-    "casmas": "college of arts social and management sciences",
-    "cicot": "college of information and communication technology",
-    "bacolaw": "bola ajibola college of law"
-}
-
-SYNONYMS = {
-    "school fees": "tuition",
-    "fees": "tuition",
-    "accommodation": "hostel",
-    "freshers": "new students",
-    "returning students": "old students",
-    "lecturers": "academic staff",
-    "teachers": "lecturers",
-    "professors": "academic staff",
-    "registration": "enrollment",
-    "course list": "courses",
-    "head of department": "hod",
-    "contact": "phone number",
-    "cost": "price",
-    "amount": "fee",
-    "procedure": "process"
-}
-
-PLURAL_REPLACEMENTS = {
-    "students": "student",
-    "lectures": "lecture",
-    "departments": "department",
-    "fees": "fee",
-    "courses": "course",
-    "requirements": "requirement",
-    "projects": "project",
-    "contacts": "contact",
-    "exams": "exam",
-    "subjects": "subject"
-}
-
+# --- Shared resources ---
+# Built on first use and shared by all sessions; Streamlit reruns reuse them.
+EMBED_MODEL_NAME = "all-MiniLM-L6-v2"
+DATA_FILE = "qa_dataset.json"
+DICTIONARY_PATH = Path("frequency_dictionary_en_82_765.txt")
+
+@resource("university_chatbot.model_load")
+def get_embed_model():
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(EMBED_MODEL_NAME)
+
+@resource("university_chatbot.data_load")
+def get_qa_data():
+    with open(DATA_FILE, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+@resource("university_chatbot.encode")
+def get_question_embeddings():
+    embed_model = get_embed_model()
+    questions = [item["question"] for item in get_qa_data()]
+    return encode_with_cache(questions, EMBED_MODEL_NAME, lambda batch: embed_model.encode(batch))
+
+@resource("university_chatbot.index_build")
+def get_index():
+    question_embeddings = get_question_embeddings()
+    index = faiss.IndexFlatL2(question_embeddings.shape[1])
+    index.add(question_embeddings)
+    return index
+
+@resource("university_chatbot.dictionary_load")
+def get_sym_spell():
+    return load_sym_spell(DICTIONARY_PATH, max_edit_distance=2, prefix_length=7)
+
+# Skips course codes and other domain words, memoizes the rest
+@resource("university_chatbot.spell_corrector")
+def get_spell_corrector():
+    return SpellCorrector(get_sym_spell(), build_domain_vocabulary(), name="university_chatbot.spelling")
+
+# Abbreviations, synonyms and plurals (utils/lexicon.py) in one compiled pass each
 def normalize_input(text):
-    text = text.lower()
-    # Abbreviation expansion
-    for abbr, full in ABBREVIATIONS.items():
-        text = re.sub(rf"\b{re.escape(abbr)}\b", full, text)
-    # Synonym replacement
-    for syn, base in SYNONYMS.items():
-        text = re.sub(rf"\b{re.escape(syn)}\b", base, text)
-    # Plural to singular
-    for plural, singular in PLURAL_REPLACEMENTS.items():
-        text = re.sub(rf"\b{plural}\b", singular, text)
-    return text
+    return query_normalizer(text)
 
 def correct_spelling(text):
-    suggestions = sym_spell.lookup_compound(text, max_edit_distance=2)
-    return suggestions[0].term if suggestions else text
+    return get_spell_corrector().correct_compound(text)
 
 def detect_sentiment(text):
     polarity = TextBlob(text).sentiment.polarity
@@ -110,52 +76,113 @@ def detect_sentiment(text):
         return "negative"
     return "neutral"
 
+# Query caches (process-wide, so they survive Streamlit reruns)
+query_cache = get_cache("university_chatbot.query")
+query_embedding_cache = get_cache("university_chatbot.query_embedding")
+search_cache = get_cache("university_chatbot.search")
+answer_cache = get_cache("university_chatbot.answer")
+# GPT fallback replies, also served to close paraphrases of a cached query
+fallback_cache = get_semantic_cache("university_chatbot.fallback")
+
+def clean_query(user_input):
+    with span("university_chatbot.clean_query"):
+        return query_cache.get_or_set(normalize_query(user_input),
+                                      lambda: normalize_input(correct_spelling(user_input)))
+
+def query_embedding(query):
+    with span("university_chatbot.encode"):
+        return query_embedding_cache.get_or_set(
+            query, lambda: get_embed_model().encode([query], convert_to_tensor=True).cpu().numpy())
+
+def search_index(query):
+    embedding = query_embedding(query)
+    with span("university_chatbot.faiss_search"):
+        D, I = get_index().search(embedding, k=1)
+    return float(D[0][0]), int(I[0][0])
+
 def search_answer(user_input):
-    query = normalize_input(correct_spelling(user_input))
-    query_embedding = embed_model.encode([query], convert_to_tensor=True).cpu().numpy()
-    D, I = index.search(query_embedding, k=1)
-    top_score = D[0][0]
-    top_match = qa_data[I[0][0]]
+    query = clean_query(user_input)
+    top_score, top_index = search_cache.get_or_set(query, lambda: search_index(query))
+    top_match = get_qa_data()[top_index]
     return top_match if top_score < 0.5 else None
 
-def fallback_gpt(user_input, history=[]):
+def fallback_messages(user_input):
     prompt = f"""
 You are CrescentBot, a friendly and helpful assistant for a university. Be conversational, empathetic, and informative.
 User: {user_input}
 Assistant:
 """
-    response = openai.ChatCompletion.create(
-        model="gpt-4",
-        messages=[
-            {"role": "system", "content": "You are a helpful university assistant."},
-            {"role": "user", "content": prompt}
-        ],
-        max_tokens=300
-    )
-    return response.choices[0].message["content"].strip()
-
-# Streamlit UI
-st.set_page_config(page_title="🎓 CrescentBot - University Assistant", layout="wide")
-st.title("🎓 CrescentBot - University Assistant")
+    return [
+        {"role": "system", "content": "You are a helpful university assistant."},
+        {"role": "user", "content": prompt}
+    ]
 
-if "chat_history" not in st.session_state:
-    st.session_state.chat_history = []
+# Streams the reply; on_complete(reply) runs once it has fully arrived
+def stream_fallback_gpt(user_input, history=[], on_complete=None):
+    with span("university_chatbot.fallback_gpt"):
+        yield from stream_chat(fallback_messages(user_input), model="gpt-4",
+                               on_complete=on_complete, max_tokens=300)
 
-user_input = st.chat_input("Ask me anything about Crescent University...")
-
-if user_input:
-    st.session_state.chat_history.append({"role": "user", "content": user_input})
-
-    sentiment = detect_sentiment(user_input)
-    response = search_answer(user_input)
-
-    if response:
-        answer = response["answer"]
-    else:
-        answer = fallback_gpt(user_input, st.session_state.chat_history)
-
-    st.session_state.chat_history.append({"role": "assistant", "content": answer})
+def fallback_gpt(user_input, history=[]):
+    return "".join(stream_fallback_gpt(user_input, history)).strip()
 
-for chat in st.session_state.chat_history:
-    with st.chat_message(chat["role"]):
-        st.markdown(chat["content"])
+# Streamlit UI
+# Streamlit runs this file as __main__; importing it (e.g. from the
+# benchmarks) only defines the functions above.
+def main():
+    st.set_page_config(page_title="🎓 CrescentBot - University Assistant", layout="wide")
+    start_exporters()
+    st.title("🎓 CrescentBot - University Assistant")
+
+    if "chat_history" not in st.session_state:
+        st.session_state.chat_history = []
+
+    for chat in st.session_state.chat_history:
+        with st.chat_message(chat["role"]):
+            st.markdown(chat["content"])
+
+    user_input = st.chat_input("Ask me anything about Crescent University...")
+
+    if user_input:
+        st.session_state.chat_history.append({"role": "user", "content": user_input})
+        with st.chat_message("user"):
+            st.markdown(user_input)
+
+        count("university_chatbot.responses")
+        sentiment = detect_sentiment(user_input)
+        with span("university_chatbot.search_answer"):
+            response = search_answer(user_input)
+
+        with st.chat_message("assistant"):
+            answer_key = clean_query(user_input)
+            answer = response["answer"] if response else answer_cache.get(answer_key)
+            if answer is None:
+                count("university_chatbot.fallbacks")
+                answer = fallback_cache.get(query_embedding(answer_key))
+                if answer is not None:
+                    count("university_chatbot.semantic_cache_hits")
+            if answer is not None:
+                st.markdown(answer)
+            else:
+                started = time.perf_counter()
+
+                def remember(reply):
+                    answer_cache.set(answer_key, reply.strip())
+                    fallback_cache.set(query_embedding(answer_key), reply.strip(),
+                                       latency=time.perf_counter() - started)
+
+                # GPT fallback renders token by token as it streams in
+                answer = st.write_stream(stream_fallback_gpt(
+                    user_input, st.session_state.chat_history, on_complete=remember)).strip()
+
+        st.session_state.chat_history.append({"role": "assistant", "content": answer})
+
+    with st.sidebar.expander("Startup timings"):
+        st.code(format_startup_report())
+
+    with st.sidebar.expander("Streaming metrics"):
+        st.json(stream_metrics.summary())
+
+
+if __name__ == "__main__":
+    main()
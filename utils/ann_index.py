@@ -0,0 +1,157 @@
+import os
+import math
+import faiss
+import numpy as np
+
+# --- FAISS index factory ---
+# One place that knows how to build each index type, so a deployment can pick
+# one with INDEX_KIND / INDEX_METRIC without code changes.
+#   flat  - exact search, the baseline
+#   hnsw  - graph index: fast, high recall, no removals, flat memory + links
+#   ivfpq - inverted lists of product-quantized codes: smallest, needs training
+# Metric "ip" is inner product on L2-normalized vectors (cosine similarity).
+# Flat and HNSW vectors are stored as float32, float16 or scalar-quantized
+# int8 (INDEX_STORAGE); IVF-PQ always stores PQ codes.
+INDEX_KINDS = ("flat", "hnsw", "ivfpq")
+METRICS = {"l2": faiss.METRIC_L2, "ip": faiss.METRIC_INNER_PRODUCT}
+STORAGES = {
+    "float32": None,
+    "float16": faiss.ScalarQuantizer.QT_fp16,
+    "int8": faiss.ScalarQuantizer.QT_8bit,
+}
+
+INDEX_KIND = os.getenv("INDEX_KIND", "flat")
+INDEX_METRIC = os.getenv("INDEX_METRIC", "l2")
+INDEX_STORAGE = os.getenv("INDEX_STORAGE", "float32")
+HNSW_M = int(os.getenv("INDEX_HNSW_M", "32"))
+HNSW_EF_CONSTRUCTION = int(os.getenv("INDEX_HNSW_EF_CONSTRUCTION", "80"))
+HNSW_EF_SEARCH = int(os.getenv("INDEX_HNSW_EF_SEARCH", "64"))
+IVF_NPROBE = int(os.getenv("INDEX_IVF_NPROBE", "16"))
+PQ_BYTES = int(os.getenv("INDEX_PQ_BYTES", "64"))
+PQ_BITS = 8
+# k-means wants this many training vectors per inverted list
+IVF_POINTS_PER_LIST = 39
+
+
+def ivf_lists(size):
+    return max(1, min(int(4 * math.sqrt(max(size, 1))), size // IVF_POINTS_PER_LIST or 1))
+
+def _pq_subquantizers(dim, pq_bytes):
+    m = min(pq_bytes, dim)
+    while dim % m:
+        m -= 1
+    return m
+
+# Index of the given kind, wrapped so vectors carry our own int64 IDs.
+# size is the expected number of vectors, used to size IVF lists.
+def make_index(dim, kind=None, metric=None, size=0, storage=None):
+    kind = kind or INDEX_KIND
+    metric = metric or INDEX_METRIC
+    storage = storage or INDEX_STORAGE
+    if kind not in INDEX_KINDS:
+        raise ValueError(f"Unknown index kind {kind!r}, expected one of {INDEX_KINDS}")
+    if storage not in STORAGES:
+        raise ValueError(f"Unknown index storage {storage!r}, expected one of {tuple(STORAGES)}")
+    faiss_metric = METRICS[metric]
+    qtype = STORAGES[storage]
+
+    if kind == "flat" and qtype is None:
+        base = faiss.IndexFlat(dim, faiss_metric)
+    elif kind == "flat":
+        base = faiss.IndexScalarQuantizer(dim, qtype, faiss_metric)
+    elif kind == "hnsw":
+        if qtype is None:
+            base = faiss.IndexHNSWFlat(dim, HNSW_M, faiss_metric)
+        else:
+            base = faiss.IndexHNSWSQ(dim, qtype, HNSW_M, faiss_metric)
+        base.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+    else:
+        quantizer = faiss.IndexFlat(dim, faiss_metric)
+        base = faiss.IndexIVFPQ(quantizer, dim, ivf_lists(size), _pq_subquantizers(dim, PQ_BYTES),
+                                PQ_BITS, faiss_metric)
+        # Small corpora train on fewer points than k-means would like; that
+        # is expected, so skip the per-codebook warnings
+        base.cp.min_points_per_centroid = 1
+        base.pq.cp.min_points_per_centroid = 1
+    index = faiss.IndexIDMap(base)
+    tune_index(index)
+    return index
+
+def base_index(index):
+    if isinstance(index, faiss.IndexIDMap):
+        return faiss.downcast_index(index.index)
+    return faiss.downcast_index(index)
+
+def index_kind(index):
+    base = base_index(index)
+    if isinstance(base, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(base, faiss.IndexIVF):
+        return "ivfpq"
+    return "flat"
+
+def index_storage(index):
+    base = base_index(index)
+    if isinstance(base, faiss.IndexHNSW):
+        base = faiss.downcast_index(base.storage)
+    if isinstance(base, faiss.IndexScalarQuantizer):
+        return next(name for name, qtype in STORAGES.items() if qtype == base.sq.qtype)
+    return "pq" if isinstance(base, faiss.IndexIVF) else "float32"
+
+def index_metric(index):
+    return "ip" if index.metric_type == faiss.METRIC_INNER_PRODUCT else "l2"
+
+# Search-time knobs are not always stored with the index, so they are applied
+# after every build or load
+def tune_index(index, ef_search=None, nprobe=None):
+    base = base_index(index)
+    if isinstance(base, faiss.IndexHNSW):
+        base.hnsw.efSearch = ef_search or HNSW_EF_SEARCH
+    elif isinstance(base, faiss.IndexIVF):
+        base.nprobe = nprobe or IVF_NPROBE
+    return index
+
+# HNSW graphs cannot drop vectors; such indexes are rebuilt instead
+def supports_remove(index):
+    return index_kind(index) != "hnsw"
+
+# float32 matrix ready for add/search: normalized when the metric is "ip"
+def prepare_vectors(vectors, index):
+    matrix = np.ascontiguousarray(np.asarray(vectors, dtype="float32"))
+    if index_metric(index) == "ip":
+        matrix = matrix.copy()
+        faiss.normalize_L2(matrix)
+    return matrix
+
+def min_training_vectors(index):
+    base = base_index(index)
+    if index.is_trained:
+        return 0
+    if isinstance(base, faiss.IndexIVF):
+        return max(base.nlist, 2 ** PQ_BITS)
+    return 1
+
+# Add vectors, training the index on them first if it needs it (IVF-PQ and
+# int8 storage, whose per-dimension ranges come from the first batch)
+def add_vectors(index, vectors, ids):
+    matrix = prepare_vectors(vectors, index)
+    if not index.is_trained:
+        needed = min_training_vectors(index)
+        if len(matrix) < needed:
+            raise ValueError(f"Index needs at least {needed} vectors to train, got {len(matrix)}")
+        base_index(index).train(matrix)
+    index.add_with_ids(matrix, np.asarray(ids, dtype="int64"))
+
+def search(index, vectors, k):
+    return index.search(prepare_vectors(vectors, index), k)
+
+def index_bytes(index):
+    return int(faiss.serialize_index(index).nbytes)
+
+# Read an index from disk. With mmap the vector data stays in the page cache,
+# shared by every process that opens the same file, instead of being copied
+# into each one. A mapped index is read-only: adding or removing vectors
+# aborts the process, so only map indexes that will not be modified.
+def read_index(path, mmap=False):
+    flags = faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY if mmap else 0
+    return tune_index(faiss.read_index(path, flags))
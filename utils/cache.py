@@ -0,0 +1,90 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+
+DEFAULT_MAXSIZE = int(os.getenv("QUERY_CACHE_SIZE", "1024"))
+DEFAULT_TTL = float(os.getenv("QUERY_CACHE_TTL", "3600"))
+
+_MISSING = object()
+
+
+# Thread-safe LRU cache whose entries also expire after ttl seconds.
+class TTLCache:
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, ttl=DEFAULT_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is not _MISSING:
+                value, expires = item
+                if expires > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    # Return the cached value, computing and storing it on a miss. Two threads
+    # missing at once may both compute; the last write wins.
+    def get_or_set(self, key, compute):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.set(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+# Caches live here rather than in the Streamlit scripts, which are re-executed
+# on every rerun, so they are shared by all sessions in the process.
+_caches = {}
+_caches_lock = threading.Lock()
+
+def get_cache(name, maxsize=DEFAULT_MAXSIZE, ttl=DEFAULT_TTL):
+    return register_cache(name, lambda: TTLCache(maxsize, ttl))
+
+# Any cache with a stats() dict; factory() runs only the first time a name is used
+def register_cache(name, factory):
+    with _caches_lock:
+        if name not in _caches:
+            _caches[name] = factory()
+        return _caches[name]
+
+def cache_stats():
+    with _caches_lock:
+        return {name: cache.stats() for name, cache in _caches.items()}
+
+# Cheap key normalization for raw user input
+def normalize_query(text):
+    return " ".join(text.lower().split())
@@ -1,15 +1,175 @@
+import os
+import re
 import json
+import hashlib
+import numbers
+from collections import namedtuple
 
+# --- Streaming knowledge-base chunker ---
+# Records are read one at a time, never as a whole parsed file: JSON arrays
+# through ijson when it is installed (a built-in incremental decoder
+# otherwise), JSONL line by line. Each valid record becomes one or more
+# "Q: ...\nA: ..." chunks that keep its metadata; answers longer than
+# max_chars are split on sentence boundaries, neighbouring parts sharing
+# `overlap` sentences, instead of being truncated.
+METADATA_FIELDS = ("topic", "faculty", "department", "level", "semester")
+JSONL_SUFFIXES = (".jsonl", ".ndjson")
+READ_BLOCK = 1 << 16
+
+# id: stable int64 from the text (see chunk_id); source/record/part locate it
+Chunk = namedtuple("Chunk", "id text source record part metadata")
+
+# Stable ID for a chunk: the same text always maps to the same positive int64
+def chunk_id(text):
+    digest = hashlib.sha256(text.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") & 0x7FFFFFFFFFFFFFFF
+
+
+# --- Reading records ---
+def _iter_json_array(f, block=READ_BLOCK):
+    decoder = json.JSONDecoder()
+    buf = f.read(block).lstrip()
+    if not buf.startswith("["):
+        raise ValueError("expected a JSON array of records")
+    pos = 1
+    while True:
+        while pos < len(buf) and buf[pos] in " \t\r\n,":
+            pos += 1
+        if pos < len(buf) and buf[pos] == "]":
+            return
+        try:
+            if pos == len(buf):
+                raise json.JSONDecodeError("need more data", buf, pos)
+            item, end = decoder.raw_decode(buf, pos)
+            # A value must be followed by a separator: one ending at the end
+            # of the buffer, or at a "." or "e" that starts the rest of a
+            # number split across reads, is only trusted at EOF
+            complete = end < len(buf) and buf[end] in " \t\r\n,]"
+        except json.JSONDecodeError:
+            end, complete = None, False
+        if not complete:
+            # The next record runs past the buffer: read on (at least doubling
+            # the buffer, so one huge record does not decode over and over)
+            more = f.read(max(block, len(buf) - pos))
+            if more:
+                buf, pos = buf[pos:] + more, 0
+                continue
+            if end is None:
+                raise json.JSONDecodeError("unexpected end of data", buf, len(buf))
+        pos = end
+        yield item
+        if pos > block:
+            buf, pos = buf[pos:], 0
+
+def _iter_raw(path):
+    if str(path).endswith(JSONL_SUFFIXES):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    try:
+                        yield json.loads(line)
+                    except ValueError as e:
+                        yield e
+        return
+    try:
+        import ijson
+    except ImportError:
+        ijson = None
+    if ijson is not None:
+        with open(path, "rb") as f:
+            yield from ijson.items(f, "item")
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            yield from _iter_json_array(f)
+
+def _text(value):
+    if value is None:
+        return ""
+    # ijson hands back non-integer numbers as Decimal
+    if isinstance(value, (str, numbers.Number)):
+        return str(value).strip()
+    raise ValueError(f"expected a string, got {type(value).__name__}")
+
+# Normalized record, or raises ValueError saying what is wrong with it
+def validate_record(raw):
+    if isinstance(raw, Exception):
+        raise ValueError(f"invalid JSON: {raw}")
+    if not isinstance(raw, dict):
+        raise ValueError(f"expected an object, got {type(raw).__name__}")
+    record = {}
+    for field in ("question", "answer") + METADATA_FIELDS:
+        try:
+            record[field] = _text(raw.get(field))
+        except ValueError as e:
+            raise ValueError(f"{field}: {e}")
+    if not record["question"] or not record["answer"]:
+        raise ValueError("missing question or answer")
+    return record
+
+# (record number, record) for the valid records in one file; invalid ones are
+# counted and reported once the file is done
+def iter_records(path):
+    skipped, first_error = 0, None
+    for record_no, raw in enumerate(_iter_raw(path)):
+        try:
+            yield record_no, validate_record(raw)
+        except ValueError as e:
+            skipped += 1
+            first_error = first_error or f"record {record_no}: {e}"
+    if skipped:
+        print(f"[WARN] {path}: skipped {skipped} invalid records (first: {first_error})")
+
+
+# --- Splitting long answers ---
+SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+
+def _split_words(text, max_chars):
+    parts, current = [], ""
+    for word in text.split():
+        if current and len(current) + 1 + len(word) > max_chars:
+            parts.append(current)
+            current = word
+        else:
+            current = f"{current} {word}" if current else word
+    return parts + [current] if current else parts
+
+# Parts of at most max_chars (single words aside), cut between sentences;
+# each part starts with the last `overlap` sentences of the one before
+def split_text(text, max_chars=None, overlap=1):
+    if not max_chars or len(text) <= max_chars:
+        return [text]
+    pieces = []
+    for sentence in SENTENCE_RE.split(text.strip()):
+        pieces.extend(_split_words(sentence, max_chars) if len(sentence) > max_chars else [sentence])
+
+    parts, current = [], []
+    for piece in pieces:
+        if current and len(" ".join(current + [piece])) > max_chars:
+            parts.append(" ".join(current))
+            current = current[-overlap:] if overlap else []
+            while current and len(" ".join(current + [piece])) > max_chars:
+                current.pop(0)
+        current.append(piece)
+    if current:
+        parts.append(" ".join(current))
+    return parts
+
+
+# --- Chunks ---
+# paths: one file or a list of .json / .jsonl files, read in order
+def iter_chunks(paths, max_chars=None, overlap=1):
+    if isinstance(paths, (str, os.PathLike)):
+        paths = [paths]
+    for path in paths:
+        for record_no, record in iter_records(path):
+            prefix = f"Q: {record['question']}\nA: "
+            # The question is repeated in every part; the answer gets the rest
+            answer_chars = max(max_chars - len(prefix), max_chars // 2) if max_chars else None
+            metadata = {field: record[field] for field in METADATA_FIELDS if record[field]}
+            for part_no, part in enumerate(split_text(record["answer"], answer_chars, overlap)):
+                text = prefix + part
+                yield Chunk(chunk_id(text), text, str(path), record_no, part_no, metadata)
+
+# max_chars=None keeps chunks whole (the context builder budgets tokens instead)
 def load_json_chunks(path, max_chars=1000):
-    with open(path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-
-    chunks = []
-    for entry in data:
-        q = entry.get("question", "").strip()
-        a = entry.get("answer", "").strip()
-        if q and a:
-            chunk = f"Q: {q}\nA: {a}"
-            chunks.append(chunk[:max_chars])  # optional truncation
-
-    return chunks
+    return [chunk.text for chunk in iter_chunks(path, max_chars)]
@@ -0,0 +1,86 @@
+import re
+from functools import lru_cache
+from collections import namedtuple
+
+# Tokens the chat format adds per message and to prime the reply
+TOKENS_PER_MESSAGE = 3
+REPLY_PRIMING_TOKENS = 3
+# Rough size of a token when no encoder is available
+CHARS_PER_TOKEN = 4
+
+WORD_RE = re.compile(r"\w+")
+
+
+# --- Token counting ---
+# Building an encoder parses its whole BPE table, so it is done once per model.
+# tiktoken downloads the table on first use; offline, counts fall back to an
+# estimate from the text length.
+@lru_cache(maxsize=None)
+def get_encoder(model):
+    try:
+        import tiktoken
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        print(f"[WARN] No tokenizer for {model} ({e}); estimating token counts.")
+        return None
+
+# Chunk texts repeat across requests, so their counts are memoized
+@lru_cache(maxsize=20000)
+def count_tokens(text, model="gpt-4"):
+    encoder = get_encoder(model)
+    if encoder is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(encoder.encode(text))
+
+def count_message_tokens(messages, model="gpt-4"):
+    return REPLY_PRIMING_TOKENS + sum(
+        TOKENS_PER_MESSAGE + count_tokens(m["content"], model) for m in messages)
+
+def truncate_to_tokens(text, max_tokens, model="gpt-4"):
+    encoder = get_encoder(model)
+    if encoder is None:
+        return text[:max_tokens * CHARS_PER_TOKEN]
+    return encoder.decode(encoder.encode(text)[:max_tokens])
+
+
+# --- Near-duplicate removal ---
+def _word_set(text):
+    return frozenset(WORD_RE.findall(text.lower()))
+
+# Keep the first of any group of chunks whose word sets overlap by at least
+# threshold (Jaccard), so the same fact worded twice costs tokens only once
+def dedupe_chunks(chunks, threshold=0.9):
+    kept, kept_words = [], []
+    for chunk in chunks:
+        words = _word_set(chunk)
+        if any(len(words & other) >= threshold * len(words | other) for other in kept_words):
+            continue
+        kept.append(chunk)
+        kept_words.append(words)
+    return kept
+
+
+# --- Context packing ---
+Context = namedtuple("Context", "text chunks tokens duplicates skipped")
+
+# Pack chunks (best first) into at most budget tokens. A chunk that does not
+# fit is skipped so smaller, lower-ranked ones can still use the room; only
+# the top chunk is ever truncated, so there is always some context.
+def build_context(chunks, budget, model="gpt-4", separator="\n", dedupe_threshold=0.9):
+    unique = dedupe_chunks(chunks, dedupe_threshold)
+    separator_tokens = count_tokens(separator, model)
+    selected, used, skipped = [], 0, 0
+    for chunk in unique:
+        cost = count_tokens(chunk, model) + (separator_tokens if selected else 0)
+        if used + cost <= budget:
+            selected.append(chunk)
+            used += cost
+        elif not selected and budget > 0:
+            selected.append(truncate_to_tokens(chunk, budget, model))
+            used = count_tokens(selected[0], model)
+        else:
+            skipped += 1
+    return Context(separator.join(selected), selected, used, len(chunks) - len(unique), skipped)
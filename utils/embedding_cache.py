@@ -0,0 +1,286 @@
+import os
+import json
+import atexit
+import hashlib
+import threading
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, one process per cache
+    fcntl = None
+
+CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", ".embedding_cache")
+MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "200000"))
+CACHE_VERSION = 1
+KEY_BYTES = 32
+MIN_CAPACITY = 1024
+
+def normalize_for_key(text):
+    return " ".join(text.split())
+
+def cache_key(text, model):
+    payload = f"{model}\0{normalize_for_key(text)}".encode("utf-8")
+    return hashlib.sha256(payload).digest()
+
+
+# --- Content-addressed embedding store ---
+# One directory per model holding three memory-mapped arrays that share a slot
+# number: vectors (float32), keys (sha256 of model + normalized text) and
+# last-use ticks for LRU eviction. Lookups only touch the rows they need, so
+# opening a large cache is cheap. Several processes (Streamlit workers, the
+# retrieval server) may share a directory: writes hold an flock on its lock
+# file, files only ever grow, and a lookup checks the slot still holds its key
+# since another process may have evicted it.
+class EmbeddingCache:
+    def __init__(self, model, cache_dir=CACHE_DIR, max_entries=MAX_ENTRIES):
+        self.model = model
+        self.max_entries = max_entries
+        safe_name = "".join(c if c.isalnum() or c in "-_." else "_" for c in model)
+        self.path = os.path.join(cache_dir, safe_name)
+        self._lock = threading.Lock()
+        self.dim = None
+        self.capacity = 0
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._slots = {}
+        self._tick = 0
+        self._vectors = self._keys = self._ticks = None
+        self._load()
+
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    def _load(self):
+        try:
+            with open(self._file("meta.json"), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return
+        if meta.get("version") != CACHE_VERSION or meta.get("model") != self.model:
+            print(f"[WARN] Ignoring incompatible embedding cache at {self.path}")
+            return
+        try:
+            self.dim = meta["dim"]
+            self._open(meta["capacity"])
+        except (OSError, ValueError, KeyError) as e:
+            print(f"[WARN] Failed to open embedding cache: {e}. Starting empty.")
+            self.dim = None
+            self.capacity = 0
+            return
+        keys = np.asarray(self._keys)
+        used = np.flatnonzero(self._ticks > 0)
+        self._slots = {keys[i].tobytes(): int(i) for i in used}
+        self.size = len(self._slots)
+        self._tick = int(self._ticks.max()) if self.capacity else 0
+
+    def _open(self, capacity):
+        self._vectors = np.memmap(self._file("vectors.f32"), dtype="float32", mode="r+",
+                                  shape=(capacity, self.dim))
+        self._keys = np.memmap(self._file("keys.bin"), dtype=f"V{KEY_BYTES}", mode="r+",
+                               shape=(capacity,))
+        self._ticks = np.memmap(self._file("ticks.bin"), dtype="int64", mode="r+",
+                                shape=(capacity,))
+        self.capacity = capacity
+
+    # Exclusive across processes (flock) and across threads (self._lock)
+    def _locked(self):
+        os.makedirs(self.path, exist_ok=True)
+        return _FileLock(self._file("lock"))
+
+    # Pick up growth made by other processes before choosing slots
+    def _sync_capacity(self):
+        try:
+            on_disk = os.path.getsize(self._file("ticks.bin")) // 8
+        except OSError:
+            return
+        if on_disk > self.capacity and self.dim is not None:
+            self.flush()
+            self._open(on_disk)
+
+    def _write_meta(self):
+        meta = {"version": CACHE_VERSION, "model": self.model,
+                "dim": self.dim, "capacity": self.capacity}
+        tmp_file = self._file("meta.json.tmp")
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_file, self._file("meta.json"))
+
+    def _grow(self, needed):
+        if needed <= self.capacity or self.capacity >= self.max_entries:
+            return
+        new_capacity = min(max(needed, self.capacity * 2, MIN_CAPACITY), self.max_entries)
+        self.flush()
+        self._vectors = self._keys = self._ticks = None
+        # Extending the files zero-fills the new rows (tick 0 means empty).
+        # Never shrink: another process may already use rows past our capacity.
+        for name, row_bytes in (("vectors.f32", 4 * self.dim), ("keys.bin", KEY_BYTES), ("ticks.bin", 8)):
+            path = self._file(name)
+            size = max(os.path.getsize(path) if os.path.exists(path) else 0, new_capacity * row_bytes)
+            with open(path, "ab") as f:
+                f.truncate(size)
+        self._open(new_capacity)
+        self._write_meta()
+
+    # Slots in the shared files holding any of keys: the first 8 bytes of
+    # every stored key are matched in one pass, then confirmed in full
+    def _find_shared(self, keys):
+        if not keys or self.capacity == 0:
+            return {}
+        prefixes = np.frombuffer(b"".join(k[:8] for k in keys), dtype="<u8")
+        stored = np.asarray(self._keys).view("<u8").reshape(self.capacity, KEY_BYTES // 8)[:, 0]
+        wanted = set(keys)
+        found = {}
+        for slot in np.flatnonzero(np.isin(stored, prefixes) & (self._ticks > 0)).tolist():
+            key = self._keys[slot].tobytes()
+            if key in wanted and key not in found:
+                found[key] = slot
+                self.size += 1
+        return found
+
+    def _free_slots(self, count):
+        # Read from the shared ticks file, not self.size, which only counts
+        # this process's entries
+        free = np.flatnonzero(self._ticks == 0)[:count].tolist()
+        evict = count - len(free)
+        if evict > 0:
+            # Least recently used first, skipping the empty slots already taken
+            ticks = np.array(self._ticks)
+            ticks[free] = np.iinfo("int64").max
+            victims = np.argpartition(ticks, evict - 1)[:evict]
+            for slot in victims.tolist():
+                self._slots.pop(self._keys[slot].tobytes(), None)
+                self.size -= 1
+            free.extend(victims.tolist())
+        return free
+
+    def get_many(self, texts):
+        results = [None] * len(texts)
+        with self._lock:
+            if self.capacity == 0:
+                self.misses += len(texts)
+                return results
+            for i, text in enumerate(texts):
+                key = cache_key(text, self.model)
+                slot = self._slots.get(key)
+                if slot is None:
+                    self.misses += 1
+                    continue
+                vector = np.array(self._vectors[slot])
+                # Keys are written before vectors, so if the key still matches
+                # after the copy, the vector is ours
+                if self._keys[slot].tobytes() != key:
+                    # Evicted and reused by another process
+                    del self._slots[key]
+                    self.size -= 1
+                    self.misses += 1
+                    continue
+                self._tick += 1
+                self._ticks[slot] = self._tick
+                results[i] = vector
+                self.hits += 1
+        return results
+
+    def put_many(self, texts, vectors):
+        pairs = {}
+        for text, vec in zip(texts, vectors):
+            if vec is not None:
+                pairs[cache_key(text, self.model)] = vec
+        if not pairs:
+            return
+        with self._lock, self._locked():
+            if self.dim is None:
+                self.dim = len(next(iter(pairs.values())))
+            self._sync_capacity()
+            for key in pairs:
+                slot = self._slots.get(key)
+                if slot is not None and self._keys[slot].tobytes() != key:
+                    del self._slots[key]
+                    self.size -= 1
+            # Reuse slots other processes already hold for these keys
+            self._slots.update(self._find_shared([k for k in pairs if k not in self._slots]))
+            new_keys = [k for k in pairs if k not in self._slots]
+            used = int(np.count_nonzero(self._ticks)) if self.capacity else 0
+            self._grow(used + len(new_keys))
+            if len(new_keys) > self.capacity:
+                new_keys = new_keys[-self.capacity:]
+            for key, slot in zip(new_keys, self._free_slots(len(new_keys))):
+                self._slots[key] = slot
+                self._keys[slot] = np.frombuffer(key, dtype=f"V{KEY_BYTES}")[0]
+                self.size += 1
+            # Keep ticks ahead of other processes' so LRU order stays global
+            self._tick = max(self._tick, int(self._ticks.max()) if self.capacity else 0)
+            for key, vec in pairs.items():
+                slot = self._slots.get(key)
+                if slot is None:
+                    continue
+                self._tick += 1
+                self._vectors[slot] = np.asarray(vec, dtype="float32")
+                self._ticks[slot] = self._tick
+            # Readers in other processes map the files, so publish before unlocking
+            self.flush()
+
+    def flush(self):
+        for arr in (self._vectors, self._keys, self._ticks):
+            if arr is not None:
+                arr.flush()
+
+    # Look texts up and compute only the misses. compute_fn takes a list of
+    # texts and returns one vector (or None on failure) per text; failures are
+    # returned as None and not cached, so they are retried next time.
+    def get_or_compute(self, texts, compute_fn):
+        results = self.get_many(texts)
+        missing = [i for i, vec in enumerate(results) if vec is None]
+        if missing:
+            computed = compute_fn([texts[i] for i in missing])
+            self.put_many([texts[i] for i in missing], computed)
+            for i, vec in zip(missing, computed):
+                results[i] = None if vec is None else np.asarray(vec, dtype="float32")
+            self.flush()
+        return results
+
+    def stats(self):
+        return {"model": self.model, "size": self.size, "capacity": self.capacity,
+                "hits": self.hits, "misses": self.misses}
+
+
+class _FileLock:
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def __enter__(self):
+        self._file = open(self.path, "a")
+        if fcntl is not None:
+            fcntl.flock(self._file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if fcntl is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+        self._file.close()
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+def get_embedding_cache(model):
+    with _caches_lock:
+        if model not in _caches:
+            _caches[model] = EmbeddingCache(model)
+        return _caches[model]
+
+# Encode texts with a local model, consulting the cache first. Returns a
+# float32 matrix with one row per text.
+def encode_with_cache(texts, model_name, encode_fn):
+    cache = get_embedding_cache(model_name)
+    rows = cache.get_or_compute(list(texts), lambda batch: list(np.asarray(encode_fn(batch), dtype="float32")))
+    if not rows:
+        return np.zeros((0, cache.dim or 0), dtype="float32")
+    return np.vstack(rows)
+
+@atexit.register
+def _flush_all():
+    for cache in list(_caches.values()):
+        cache.flush()
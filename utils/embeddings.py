@@ -0,0 +1,105 @@
+import os
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import openai
+from openai import OpenAI, AsyncOpenAI
+
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_MAX_RETRIES = 5
+
+# Errors worth retrying: throttling, transient network failures and 5xx
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+)
+
+_client = None
+_client_lock = threading.Lock()
+
+def _client_settings():
+    base_url = os.getenv("OPENAI_BASE_URL")
+    api_key = os.getenv("OPENAI_API_KEY")
+    if base_url and not api_key:
+        api_key = "local"
+    return api_key, base_url
+
+# One client per process so every call shares the same HTTP connection pool.
+# OPENAI_BASE_URL points it at a local stand-in server for testing.
+def get_client():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                api_key, base_url = _client_settings()
+                # Retries are handled here so rate limits back off per batch
+                _client = OpenAI(api_key=api_key, base_url=base_url, max_retries=0)
+    return _client
+
+# Async clients are tied to the event loop they run on, so batch jobs open
+# one per run (as an async context manager) and share its connection pool
+# across all of their requests.
+def new_async_client(max_retries=3):
+    api_key, base_url = _client_settings()
+    return AsyncOpenAI(api_key=api_key, base_url=base_url, max_retries=max_retries)
+
+def clean_text(text):
+    return text.replace("\n", " ").strip()
+
+def _retry_delay(error, attempt, base_delay):
+    response = getattr(error, "response", None)
+    if response is not None:
+        try:
+            return float(response.headers.get("retry-after"))
+        except (TypeError, ValueError):
+            pass
+    return base_delay * (2 ** attempt) * (0.5 + random.random())
+
+def embed_batch(texts, model, max_retries=DEFAULT_MAX_RETRIES, base_delay=0.5):
+    client = get_client()
+    for attempt in range(max_retries + 1):
+        try:
+            response = client.embeddings.create(input=texts, model=model)
+            data = sorted(response.data, key=lambda d: d.index)
+            return [d.embedding for d in data]
+        except RETRYABLE_ERRORS as e:
+            if attempt == max_retries:
+                raise
+            delay = _retry_delay(e, attempt, base_delay)
+            print(f"[WARN] Embedding batch failed ({type(e).__name__}), retrying in {delay:.2f}s...")
+            time.sleep(delay)
+
+# Embed many texts in batches, several batches in flight at once.
+# Returns one vector per text, or None where the batch could not be embedded.
+def embed_texts(texts, model, batch_size=DEFAULT_BATCH_SIZE,
+                max_workers=DEFAULT_MAX_WORKERS, max_retries=DEFAULT_MAX_RETRIES):
+    texts = [clean_text(t) for t in texts]
+    batches = [(start, texts[start:start + batch_size])
+               for start in range(0, len(texts), batch_size)]
+    vectors = [None] * len(texts)
+    failed = 0
+
+    def run(batch):
+        start, batch_texts = batch
+        try:
+            return start, embed_batch(batch_texts, model, max_retries)
+        except Exception as e:
+            print(f"[ERROR] Embedding batch at {start} failed: {e}")
+            return start, None
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for start, batch_vectors in pool.map(run, batches):
+            if batch_vectors is None:
+                failed += min(batch_size, len(texts) - start)
+                continue
+            vectors[start:start + len(batch_vectors)] = batch_vectors
+    elapsed = time.perf_counter() - started
+
+    rate = len(texts) / elapsed if elapsed > 0 else float("inf")
+    print(f"[INFO] Embedded {len(texts) - failed}/{len(texts)} texts in {len(batches)} batches, "
+          f"{elapsed:.2f}s ({rate:.1f} texts/s)")
+    return vectors
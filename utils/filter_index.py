@@ -0,0 +1,83 @@
+import base64
+import numpy as np
+
+
+# --- Metadata filter index ---
+# One boolean row bitmap per (field, value), built once for the whole dataset.
+# A filter selection becomes a row mask: OR within a field, AND across fields.
+class MetadataIndex:
+    def __init__(self, columns):
+        # columns: field name -> list of per-row values
+        self.size = len(next(iter(columns.values()), []))
+        self.bitmaps = {}
+        for field, values in columns.items():
+            values = np.asarray(values, dtype=object)
+            self.bitmaps[field] = {v: values == v for v in set(values.tolist())}
+
+    def options(self, field):
+        return sorted(v for v in self.bitmaps[field] if v is not None)
+
+    # Row mask for the selected values, or None when nothing is selected
+    def mask(self, **selected):
+        mask = None
+        for field, values in selected.items():
+            if not values:
+                continue
+            bitmaps = self.bitmaps[field]
+            field_mask = np.zeros(self.size, dtype=bool)
+            for value in values:
+                if value in bitmaps:
+                    field_mask |= bitmaps[value]
+            mask = field_mask if mask is None else mask & field_mask
+        return mask
+
+def mask_key(mask):
+    return None if mask is None else np.packbits(mask).tobytes()
+
+# Masks travel to the retrieval server as base64 packed bits
+def mask_to_json(mask):
+    if mask is None:
+        return None
+    return {"size": len(mask), "bits": base64.b64encode(np.packbits(mask).tobytes()).decode("ascii")}
+
+def mask_from_json(data):
+    if data is None:
+        return None
+    bits = np.frombuffer(base64.b64decode(data["bits"]), dtype="uint8")
+    return np.unpackbits(bits, count=data["size"]).astype(bool)
+
+
+def normalize_rows(vectors):
+    vectors = np.asarray(vectors, dtype="float32")
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+def _unit(query_vector):
+    query = np.asarray(query_vector, dtype="float32").reshape(-1)
+    norm = np.linalg.norm(query)
+    return query / norm if norm else query
+
+# Dot products of the query with the given rows (all when rows is None).
+# embeddings is a float32 matrix or a memory-mapped VectorStore.
+def row_scores(embeddings, query, rows=None):
+    if hasattr(embeddings, "scores"):
+        return embeddings.scores(query, rows)
+    return embeddings @ query if rows is None else embeddings[rows] @ query
+
+# Cosine similarity of the query to the given rows of row-normalized embeddings
+def cosine_scores(query_vector, embeddings, rows):
+    return row_scores(embeddings, _unit(query_vector), list(rows)).tolist()
+
+# Cosine top-k over row-normalized embeddings, restricted to the rows in mask.
+# Only the selected rows are scored. Returns (scores, row ids), best first.
+def masked_top_k(query_vector, embeddings, mask=None, k=5):
+    query = _unit(query_vector)
+    rows = np.arange(len(embeddings)) if mask is None else np.flatnonzero(mask)
+    if len(rows) == 0:
+        return [], []
+    scores = row_scores(embeddings, query, rows if mask is not None else None)
+    k = min(k, len(rows))
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top])]
+    return scores[top].tolist(), rows[top].tolist()
@@ -0,0 +1,120 @@
+import re
+import math
+from collections import Counter, defaultdict
+import numpy as np
+from utils.lexicon import COURSE_CODE_RE, COURSE_CODE_QUERY_RE, course_code
+
+WORD_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be by do does for from how i in is it me my of on or "
+    "the to what when where which who why with you your q".split()
+)
+
+# Lower-case word tokens plus one extra token per course code ("csc201"), so
+# "CSC 201" and "CSC201" match each other. Documents only count upper-case
+# codes; queries accept any case, and bogus codes like "is100" simply never
+# match a document.
+def tokenize(text, query=False):
+    tokens = [t for t in WORD_RE.findall(text.lower()) if t not in STOPWORDS]
+    pattern = COURSE_CODE_QUERY_RE if query else COURSE_CODE_RE
+    tokens.extend(course_code(*m).lower() for m in pattern.findall(text))
+    return tokens
+
+def query_course_codes(text):
+    return [course_code(*m) for m in COURSE_CODE_QUERY_RE.findall(text)]
+
+
+# --- BM25 ---
+# Sparse inverted index. The per-posting BM25 weight (idf and length
+# normalization included) is computed at build time, so scoring a query is
+# one vectorized add per query term.
+class BM25Index:
+    def __init__(self, texts, k1=1.5, b=0.75):
+        self.size = len(texts)
+        docs = [Counter(tokenize(t)) for t in texts]
+        lengths = np.array([sum(d.values()) for d in docs], dtype="float32")
+        avg_length = float(lengths.mean()) if self.size else 0.0
+
+        postings = defaultdict(lambda: ([], []))
+        for doc_id, counts in enumerate(docs):
+            for term, tf in counts.items():
+                ids, tfs = postings[term]
+                ids.append(doc_id)
+                tfs.append(tf)
+
+        self.postings = {}
+        for term, (ids, tfs) in postings.items():
+            ids = np.array(ids, dtype="int64")
+            tfs = np.array(tfs, dtype="float32")
+            idf = math.log(1 + (self.size - len(ids) + 0.5) / (len(ids) + 0.5))
+            norm = tfs + k1 * (1 - b + b * lengths[ids] / (avg_length or 1.0))
+            self.postings[term] = (ids, (idf * tfs * (k1 + 1) / norm).astype("float32"))
+
+    def scores(self, query):
+        scores = np.zeros(self.size, dtype="float32")
+        for term in set(tokenize(query, query=True)):
+            posting = self.postings.get(term)
+            if posting is not None:
+                ids, weights = posting
+                scores[ids] += weights
+        return scores
+
+    # Top-k (scores, row ids) with a positive score, optionally within mask
+    def top_k(self, query, k=10, mask=None):
+        scores = self.scores(query)
+        if mask is not None:
+            scores[~mask] = 0.0
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) == 0:
+            return [], []
+        k = min(k, len(candidates))
+        top = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        top = top[np.argsort(-scores[top])]
+        return scores[top].tolist(), top.tolist()
+
+
+# --- Course code lookup ---
+# Hash map from normalized course code to the rows mentioning it. Rows whose
+# question (the text before the answer) names the code come first.
+class CourseCodeIndex:
+    def __init__(self, texts, questions=None):
+        rows = defaultdict(list)
+        for row, text in enumerate(texts):
+            question = questions[row] if questions is not None else text.split("\nA:", 1)[0]
+            asked = {course_code(*m) for m in COURSE_CODE_RE.findall(question)}
+            for code in {course_code(*m) for m in COURSE_CODE_RE.findall(text)}:
+                rows[code].append((code not in asked, row))
+        self.rows = {code: [row for _, row in sorted(hits)] for code, hits in rows.items()}
+
+    def lookup(self, query, mask=None):
+        hits = []
+        for code in query_course_codes(query):
+            for row in self.rows.get(code, ()):
+                if (mask is None or mask[row]) and row not in hits:
+                    hits.append(row)
+        return hits
+
+
+# Reciprocal rank fusion of several ranked lists of row ids
+def reciprocal_rank_fusion(rankings, k=60):
+    fused = defaultdict(float)
+    for ranking in rankings:
+        for rank, row in enumerate(ranking):
+            fused[row] += 1.0 / (k + rank + 1)
+    return sorted(fused, key=lambda row: -fused[row])
+
+
+# BM25 and course-code lookup over texts keyed by arbitrary IDs
+class SparseIndex:
+    def __init__(self, texts_by_id):
+        self.ids = list(texts_by_id)
+        texts = [texts_by_id[i] for i in self.ids]
+        self.bm25 = BM25Index(texts)
+        self.codes = CourseCodeIndex(texts)
+
+    def code_matches(self, query):
+        return [self.ids[row] for row in self.codes.lookup(query)]
+
+    def bm25_matches(self, query, k=20):
+        _, rows = self.bm25.top_k(query, k)
+        return [self.ids[row] for row in rows]
@@ -0,0 +1,85 @@
+# Lookup tables shared by the chat apps.
+
+import re
+
+# Course codes as written in the data: "CSC 201", "CSC201", "CUAB-CSC 201".
+# Groups are (prefix, number).
+COURSE_CODE_RE = re.compile(r"\b([A-Z]{2,}(?:-[A-Z]+)*)-?\s?(\d{3,})\b")
+# Same pattern for user input, which is often lower-case
+COURSE_CODE_QUERY_RE = re.compile(COURSE_CODE_RE.pattern, re.IGNORECASE)
+
+def course_code(prefix, number):
+    return f"{prefix}{number}".upper()
+
+# Abbreviations, Synonyms, Plurals
+ABBREVIATIONS = {
+    "siwes": "student industrial work experience scheme",
+    "dept": "department",
+    "dept.": "department",
+    "cuab": "crescent university",
+    "ict": "information and communication technology",
+    "cohes": "college of health sciences",
+    "coes": "college of environmental sciences",
+    "conas": "college of natural and applied sciences",
+    "casmas": "college of arts social and management sciences",
+    "cicot": "college of information and communication technology",
+    "bacolaw": "bola ajibola college of law"
+}
+
+SYNONYMS = {
+    "school fees": "tuition",
+    "fees": "tuition",
+    "accommodation": "hostel",
+    "freshers": "new students",
+    "returning students": "old students",
+    "lecturers": "academic staff",
+    "teachers": "lecturers",
+    "professors": "academic staff",
+    "registration": "enrollment",
+    "course list": "courses",
+    "head of department": "hod",
+    "contact": "phone number",
+    "cost": "price",
+    "amount": "fee",
+    "procedure": "process"
+}
+
+PLURAL_REPLACEMENTS = {
+    "students": "student",
+    "lectures": "lecture",
+    "departments": "department",
+    "fees": "fee",
+    "courses": "course",
+    "requirements": "requirement",
+    "projects": "project",
+    "contacts": "contact",
+    "exams": "exam",
+    "subjects": "subject"
+}
+
+# Chat shorthand, expanded word by word in rags.py
+CHAT_ABBREVIATIONS = {
+    "u": "you", "r": "are", "ur": "your", "ow": "how", "pls": "please", "plz": "please",
+    "tmrw": "tomorrow", "cn": "can", "wat": "what", "cud": "could", "shud": "should",
+    "wud": "would", "abt": "about", "bcz": "because", "btw": "between", "asap": "as soon as possible",
+    "idk": "i don't know", "imo": "in my opinion", "msg": "message", "doc": "document", "d": "the",
+    "yr": "year", "sem": "semester", "dept": "department", "admsn": "admission",
+    "cresnt": "crescent", "uni": "university", "clg": "college", "sch": "school",
+    "info": "information", "l": "level", "CSC": "Computer Science", "ECO": "Economics with Operations Research",
+    "PHY": "Physics", "STAT": "Statistics", "1st": "First", "2nd": "Second"
+}
+
+# Course code prefix -> department
+DEPARTMENT_MAP = {
+    "GST": "General Studies", "MTH": "Mathematics", "PHY": "Physics", "STA": "Statistics",
+    "COS": "Computer Science", "CUAB-CSC": "Computer Science", "CSC": "Computer Science",
+    "IFT": "Computer Science", "SEN": "Software Engineering", "ENT": "Entrepreneurship",
+    "CYB": "Cybersecurity", "ICT": "Information and Communication Technology",
+    "DTS": "Data Science", "CUAB-CPS": "Computer Science", "CUAB-ECO": "Economics with Operations Research",
+    "ECO": "Economics with Operations Research", "SSC": "Social Sciences", "CUAB-BCO": "Economics with Operations Research",
+    "LIB": "Library Studies", "LAW": "Law (BACOLAW)", "GNS": "General Studies", "ENG": "English",
+    "SOS": "Sociology", "PIS": "Political Science", "CPS": "Computer Science",
+    "LPI": "Law (BACOLAW)", "ICL": "Law (BACOLAW)", "LPB": "Law (BACOLAW)", "TPT": "Law (BACOLAW)",
+    "FAC": "Agricultural Sciences", "ANA": "Anatomy", "BIO": "Biological Sciences",
+    "CHM": "Chemical Sciences", "CUAB-BCH": "Biochemistry", "CUAB": "Crescent University - General"
+}
@@ -0,0 +1,90 @@
+import time
+import threading
+from collections import deque
+from utils.embeddings import get_client
+from utils import metrics
+
+METRICS_WINDOW = 500
+# The shared client has max_retries=0 for embedding batches, which back off
+# themselves; chat gets the same retries as answer_many's async client
+CHAT_MAX_RETRIES = 3
+
+
+# --- Streaming metrics ---
+# Time to first token and tokens/sec for the most recent streamed replies.
+# The OpenAI API sends one content delta per token, so deltas are counted
+# as tokens.
+class StreamMetrics:
+    def __init__(self, window=METRICS_WINDOW):
+        self._ttft = deque(maxlen=window)
+        self._tps = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.streams = 0
+        self.errors = 0
+
+    def record(self, ttft, tokens, seconds):
+        with self._lock:
+            self.streams += 1
+            if ttft is not None:
+                self._ttft.append(ttft)
+            if tokens and seconds > 0:
+                self._tps.append(tokens / seconds)
+
+    def record_error(self):
+        with self._lock:
+            self.errors += 1
+
+    def summary(self):
+        with self._lock:
+            ttft = sorted(self._ttft)
+            tps = list(self._tps)
+            return {
+                "streams": self.streams,
+                "errors": self.errors,
+                "ttft_p50_ms": ttft[len(ttft) // 2] * 1000 if ttft else None,
+                "ttft_p95_ms": ttft[int(len(ttft) * 0.95)] * 1000 if ttft else None,
+                "tokens_per_sec": sum(tps) / len(tps) if tps else None,
+            }
+
+
+stream_metrics = StreamMetrics()
+
+
+# Yield reply text as it arrives. on_complete(text) runs once the whole reply
+# has streamed without error, e.g. to cache it.
+def stream_chat(messages, model="gpt-4", on_complete=None, **params):
+    started = time.perf_counter()
+    first_token = None
+    tokens = 0
+    parts = []
+    try:
+        stream = get_client().with_options(max_retries=CHAT_MAX_RETRIES).chat.completions.create(
+            model=model, messages=messages, stream=True, **params
+        )
+        for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if not delta:
+                continue
+            if first_token is None:
+                first_token = time.perf_counter() - started
+            tokens += 1
+            parts.append(delta)
+            yield delta
+    except Exception:
+        stream_metrics.record_error()
+        metrics.count("llm.errors")
+        raise
+    elapsed = time.perf_counter() - started
+    stream_metrics.record(first_token, tokens, elapsed)
+    if first_token is not None:
+        metrics.observe("llm.time_to_first_token", first_token)
+    metrics.observe("llm.generate", elapsed)
+    metrics.count("llm.tokens", tokens)
+    if on_complete is not None:
+        on_complete("".join(parts))
+
+# Blocking variant for callers that want the whole reply
+def complete_chat(messages, model="gpt-4", **params):
+    return "".join(stream_chat(messages, model=model, **params)).strip()
@@ -0,0 +1,48 @@
+import os
+import numpy as np
+from utils.registry import resource
+
+# --- Local sentence-transformers embedder ---
+# Runs the same all-MiniLM-L6-v2 model as rags.py on the CPU, so queries are
+# embedded in-process (a few ms) instead of over the network.
+#   LOCAL_EMBEDDING_MODEL    - model name or path
+#   LOCAL_EMBEDDING_BACKEND  - "torch", or "onnx" / "openvino" for the
+#                              exported CPU runtimes (sentence-transformers >= 3.2)
+#   EMBED_THREADS            - intra-op CPU threads, 0 keeps the torch default
+#   LOCAL_EMBED_BATCH_SIZE   - texts per forward pass for bulk encoding
+LOCAL_MODEL = os.getenv("LOCAL_EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+LOCAL_BACKEND = os.getenv("LOCAL_EMBEDDING_BACKEND", "torch")
+EMBED_THREADS = int(os.getenv("EMBED_THREADS", "0"))
+LOCAL_BATCH_SIZE = int(os.getenv("LOCAL_EMBED_BATCH_SIZE", "64"))
+
+
+def set_threads(threads):
+    import torch
+    if threads > 0:
+        torch.set_num_threads(threads)
+    return torch.get_num_threads()
+
+@resource("local_embedder.model_load")
+def get_local_model():
+    from sentence_transformers import SentenceTransformer
+    threads = set_threads(EMBED_THREADS)
+    if LOCAL_BACKEND == "torch":
+        model = SentenceTransformer(LOCAL_MODEL, device="cpu")
+    else:
+        model = SentenceTransformer(LOCAL_MODEL, device="cpu", backend=LOCAL_BACKEND)
+    print(f"[INFO] Local embedder {LOCAL_MODEL} ({LOCAL_BACKEND}, {threads} threads)")
+    return model
+
+def local_dim():
+    return get_local_model().get_sentence_embedding_dimension()
+
+# Unit-length float32 rows, one per text. Texts are sorted by length inside
+# encode() so each batch pads as little as possible.
+def embed_local(texts, batch_size=LOCAL_BATCH_SIZE):
+    if not texts:
+        return []
+    vectors = get_local_model().encode(
+        list(texts), batch_size=batch_size, convert_to_numpy=True,
+        normalize_embeddings=True, show_progress_bar=False,
+    )
+    return list(np.asarray(vectors, dtype="float32"))
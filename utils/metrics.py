@@ -0,0 +1,245 @@
+import os
+import json
+import time
+import bisect
+import threading
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from utils.cache import cache_stats
+
+# --- Pipeline metrics ---
+# Named spans feed per-stage latency histograms; counters track events such
+# as GPT fallbacks. Off unless METRICS_ENABLED=1: span() then hands back a
+# shared no-op context manager and count() returns at once, so the
+# instrumentation costs a function call per stage.
+#
+# Export (either or both, started once per process by start_exporters()):
+#   METRICS_PORT=9100          Prometheus text at /metrics, JSON at /metrics.json
+#   METRICS_DUMP_PATH=m.json   JSON snapshot rewritten every METRICS_DUMP_INTERVAL s
+ENABLED = os.getenv("METRICS_ENABLED", "0") == "1"
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+DUMP_PATH = os.getenv("METRICS_DUMP_PATH", "")
+DUMP_INTERVAL = float(os.getenv("METRICS_DUMP_INTERVAL", "60"))
+PREFIX = "chatbot"
+
+# Latency bucket upper bounds in seconds (Prometheus defaults plus sub-ms)
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+           0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+    # Quantile estimated by linear interpolation inside its bucket
+    def quantile(self, q):
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * (rank - seen) / n
+            seen += n
+        return self.buckets[-1]
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count * 1000 if self.count else None,
+            "p50_ms": _ms(self.quantile(0.5)),
+            "p95_ms": _ms(self.quantile(0.95)),
+            "p99_ms": _ms(self.quantile(0.99)),
+        }
+
+def _ms(seconds):
+    return None if seconds is None else seconds * 1000
+
+
+_histograms = defaultdict(Histogram)
+_counters = defaultdict(int)
+_lock = threading.Lock()
+
+def observe(name, seconds):
+    if not ENABLED:
+        return
+    with _lock:
+        _histograms[name].observe(seconds)
+
+def count(name, amount=1):
+    if not ENABLED:
+        return
+    with _lock:
+        _counters[name] += amount
+
+
+class _Span:
+    __slots__ = ("name", "started")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.name, time.perf_counter() - self.started)
+        return False
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NOOP = _NoopSpan()
+
+# with span("rags.encode"): ...  records the block's wall time under that stage
+def span(name):
+    return _Span(name) if ENABLED else _NOOP
+
+def reset():
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
+
+
+# --- Snapshots and export ---
+# Ratios between counters, e.g. fallbacks per response
+RATES = {
+    "rags.fallback_rate": ("rags.fallbacks", "rags.responses"),
+    "university_chatbot.fallback_rate": ("university_chatbot.fallbacks", "university_chatbot.responses"),
+    "rag_engine.answer_cache_hit_rate": ("rag_engine.cached_answers", "rag_engine.requests"),
+    "rags.semantic_cache_hit_rate": ("rags.semantic_cache_hits", "rags.fallbacks"),
+    "university_chatbot.semantic_cache_hit_rate": ("university_chatbot.semantic_cache_hits", "university_chatbot.fallbacks"),
+}
+
+def snapshot():
+    with _lock:
+        stages = {name: h.summary() for name, h in sorted(_histograms.items())}
+        counters = dict(sorted(_counters.items()))
+    rates = {name: counters.get(num, 0) / counters[den] for name, (num, den) in RATES.items()
+             if counters.get(den)}
+    return {
+        "enabled": ENABLED,
+        "time": time.time(),
+        "stages": stages,
+        "counters": counters,
+        "rates": rates,
+        "caches": cache_stats(),
+    }
+
+def _labels(**labels):
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels.items()) + "}"
+
+def render_prometheus():
+    with _lock:
+        histograms = {name: (list(h.counts), h.total, h.count) for name, h in sorted(_histograms.items())}
+        counters = dict(sorted(_counters.items()))
+    lines = [f"# HELP {PREFIX}_stage_seconds Latency of each pipeline stage.",
+             f"# TYPE {PREFIX}_stage_seconds histogram"]
+    for name, (counts, total, n) in histograms.items():
+        cumulative = 0
+        for bound, bucket in zip(BUCKETS + ("+Inf",), counts):
+            cumulative += bucket
+            lines.append(f"{PREFIX}_stage_seconds_bucket{_labels(stage=name, le=bound)} {cumulative}")
+        lines.append(f"{PREFIX}_stage_seconds_sum{_labels(stage=name)} {total}")
+        lines.append(f"{PREFIX}_stage_seconds_count{_labels(stage=name)} {n}")
+
+    lines += [f"# HELP {PREFIX}_events_total Pipeline events such as fallbacks.",
+              f"# TYPE {PREFIX}_events_total counter"]
+    lines += [f"{PREFIX}_events_total{_labels(event=name)} {value}" for name, value in counters.items()]
+
+    caches = cache_stats()
+    for kind in ("hits", "misses"):
+        lines += [f"# TYPE {PREFIX}_cache_{kind}_total counter"]
+        lines += [f"{PREFIX}_cache_{kind}_total{_labels(cache=name)} {stats[kind]}"
+                  for name, stats in sorted(caches.items())]
+    lines += [f"# TYPE {PREFIX}_cache_size gauge"]
+    lines += [f"{PREFIX}_cache_size{_labels(cache=name)} {stats['size']}" for name, stats in sorted(caches.items())]
+    # Semantic caches also report the LLM calls and time their hits saved
+    semantic = {name: stats for name, stats in sorted(caches.items()) if "saved_seconds" in stats}
+    lines += [f"# TYPE {PREFIX}_cache_avoided_llm_calls_total counter"]
+    lines += [f"{PREFIX}_cache_avoided_llm_calls_total{_labels(cache=name)} {stats['avoided_calls']}"
+              for name, stats in semantic.items()]
+    lines += [f"# TYPE {PREFIX}_cache_saved_seconds_total counter"]
+    lines += [f"{PREFIX}_cache_saved_seconds_total{_labels(cache=name)} {stats['saved_seconds']}"
+              for name, stats in semantic.items()]
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.startswith("/metrics.json"):
+            body, content_type = json.dumps(snapshot()).encode("utf-8"), "application/json"
+        elif self.path.startswith("/metrics"):
+            body, content_type = render_prometheus().encode("utf-8"), "text/plain; version=0.0.4"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+def start_http_server(port, host="0.0.0.0"):
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"[INFO] Metrics at http://{host}:{port}/metrics")
+    return server
+
+def write_snapshot(path):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(snapshot(), f, indent=2)
+    os.replace(tmp_path, path)
+
+def start_json_dump(path, interval=DUMP_INTERVAL):
+    def loop():
+        while True:
+            time.sleep(interval)
+            try:
+                write_snapshot(path)
+            except OSError as e:
+                print(f"[WARN] Metrics dump failed: {e}")
+    threading.Thread(target=loop, daemon=True).start()
+    print(f"[INFO] Writing metrics to {path} every {interval:g}s")
+
+_exporters_started = False
+_exporters_lock = threading.Lock()
+
+# Idempotent: Streamlit reruns call this on every script run
+def start_exporters():
+    global _exporters_started
+    if not ENABLED or _exporters_started:
+        return
+    with _exporters_lock:
+        if _exporters_started:
+            return
+        _exporters_started = True
+        if METRICS_PORT:
+            try:
+                start_http_server(METRICS_PORT)
+            except OSError as e:
+                print(f"[WARN] Metrics endpoint not started: {e}")
+        if DUMP_PATH:
+            start_json_dump(DUMP_PATH)
@@ -0,0 +1,94 @@
+import re
+from utils.lexicon import ABBREVIATIONS, SYNONYMS, PLURAL_REPLACEMENTS, CHAT_ABBREVIATIONS
+
+
+def _is_word(c):
+    return c.isalnum() or c == "_"
+
+def _boundary(s, i):
+    return 0 < i < len(s) and _is_word(s[i - 1]) != _is_word(s[i])
+
+def _contains_word(text, key):
+    return re.search(rf"\b{re.escape(key)}\b", text) is not None
+
+def _overlaps(a, b):
+    # True if a whole-word match of b can start inside a match of a
+    return any(a[-n:] == b[:n] and _boundary(a, len(a) - n) and _boundary(b, n)
+               for n in range(1, min(len(a), len(b))))
+
+# Entries that can see each other's input or output must keep their relative
+# order; anything else can share a single alternation.
+def _conflicts(earlier_key, earlier_value, key):
+    return (
+        _contains_word(key, earlier_key)
+        or _overlaps(earlier_key, key) or _overlaps(key, earlier_key)
+        or _contains_word(earlier_value, key)
+        or _overlaps(earlier_value, key) or _overlaps(key, earlier_value)
+    )
+
+
+# --- Table replacer ---
+# Replaces whole-word keys from one table. Equivalent to running
+#     re.sub(rf"\b{re.escape(key)}\b", value, text)
+# for every entry in table order, but entries are grouped into as few
+# compiled alternations as that order allows (usually one or two) and each
+# alternation tries longer keys first.
+#
+# ignore_case matches the old rags lookup, table.get(word.lower(), word):
+# input words are lower-cased and keys are not, so keys with capitals (CSC,
+# ECO, ...) never match and are left out.
+class Replacer:
+    def __init__(self, table, ignore_case=False):
+        self.ignore_case = ignore_case
+        if ignore_case:
+            table = {k: v for k, v in table.items() if k == k.lower()}
+        self.words = dict(table)
+        self.stages = []
+        stage = []
+        for key, value in table.items():
+            if any(_conflicts(k, v, key) for k, v in stage):
+                self.stages.append(self._compile(stage))
+                stage = []
+            stage.append((key, value))
+        if stage:
+            self.stages.append(self._compile(stage))
+
+    def _compile(self, entries):
+        lookup = dict(entries)
+        alternation = "|".join(re.escape(k) for k in sorted(lookup, key=len, reverse=True))
+        flags = re.IGNORECASE if self.ignore_case else 0
+        return re.compile(rf"\b(?:{alternation})\b", flags), lookup
+
+    def __call__(self, text):
+        for pattern, lookup in self.stages:
+            if self.ignore_case:
+                text = pattern.sub(lambda m: lookup[m.group(0).lower()], text)
+            else:
+                text = pattern.sub(lambda m: lookup[m.group(0)], text)
+        return text
+
+    # Token-level variant for text that is already split into words: one dict
+    # lookup per word, no regex
+    def expand_words(self, words):
+        if self.ignore_case:
+            return [self.words.get(w.lower(), w) for w in words]
+        return [self.words.get(w, w) for w in words]
+
+
+# Applies several tables in sequence, optionally lower-casing first
+class Normalizer:
+    def __init__(self, tables, lowercase=False, ignore_case=False):
+        self.lowercase = lowercase
+        self.replacers = [Replacer(t, ignore_case) for t in tables]
+
+    def __call__(self, text):
+        if self.lowercase:
+            text = text.lower()
+        for replace in self.replacers:
+            text = replace(text)
+        return text
+
+
+# Compiled once per process and shared by the apps
+query_normalizer = Normalizer([ABBREVIATIONS, SYNONYMS, PLURAL_REPLACEMENTS], lowercase=True)
+shorthand_expander = Replacer(CHAT_ABBREVIATIONS, ignore_case=True)
@@ -0,0 +1,62 @@
+import sys
+import json
+import numpy as np
+
+
+# --- Columnar Q&A record store ---
+# The knowledge base as parallel columns: interned question / answer / text
+# strings and small-int codes for the metadata fields. Row ids match the
+# embedding and sparse indexes, so a search hit is a list index, and exact
+# questions resolve through a lower-cased hash map instead of a scan.
+class RecordStore:
+    def __init__(self, records, code_fields=()):
+        self.questions = [sys.intern(r["question"]) for r in records]
+        self.answers = [sys.intern(r["answer"]) for r in records]
+        self.texts = [f"Q: {q}\nA: {a}" for q, a in zip(self.questions, self.answers)]
+
+        # field -> (vocabulary, int32 code per row)
+        self.fields = {}
+        for field in code_fields:
+            vocabulary, codes, positions = [], np.empty(len(records), dtype="int32"), {}
+            for row, record in enumerate(records):
+                value = record.get(field, "")
+                if value not in positions:
+                    positions[value] = len(vocabulary)
+                    vocabulary.append(sys.intern(value))
+                codes[row] = positions[value]
+            self.fields[field] = (vocabulary, codes)
+
+        # lower-cased question -> rows, in dataset order
+        self.exact = {}
+        for row, question in enumerate(self.questions):
+            self.exact.setdefault(question.lower(), []).append(row)
+
+    def __len__(self):
+        return len(self.questions)
+
+    def value(self, field, row):
+        vocabulary, codes = self.fields[field]
+        return vocabulary[codes[row]]
+
+    def column(self, field):
+        vocabulary, codes = self.fields[field]
+        return [vocabulary[code] for code in codes]
+
+    # First row whose question equals the text (case-insensitive) among the
+    # rows mask allows, or None
+    def find_exact(self, text, mask=None):
+        for row in self.exact.get(text.strip().lower(), ()):
+            if mask is None or mask[row]:
+                return row
+        return None
+
+# Records with both a question and an answer, whitespace stripped
+def load_records(path, code_fields=()):
+    with open(path, "r", encoding="utf-8") as f:
+        raw_data = json.load(f)
+    records = []
+    for entry in raw_data:
+        record = {field: (entry.get(field) or "").strip() for field in ("question", "answer") + tuple(code_fields)}
+        if record["question"] and record["answer"]:
+            records.append(record)
+    return RecordStore(records, code_fields)
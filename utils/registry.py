@@ -0,0 +1,79 @@
+import time
+import threading
+from functools import wraps
+
+# --- Process-wide resource registry ---
+# Heavy objects (models, dictionaries, indexes) are built on first use and
+# then shared by every Streamlit session and rerun in the process. Streamlit
+# re-executes the app script on each rerun, so the registry has to live in an
+# imported module like this one rather than in the script itself.
+
+_resources = {}
+_timings = {}
+_locks = {}
+_registry_lock = threading.Lock()
+_building = threading.local()
+
+
+def _lock_for(name):
+    with _registry_lock:
+        return _locks.setdefault(name, threading.RLock())
+
+# Decorator: the wrapped zero-argument factory runs once per process and its
+# result is returned from then on. Build time is recorded per resource,
+# excluding time spent building other resources it depends on.
+def resource(name):
+    def decorator(factory):
+        @wraps(factory)
+        def get():
+            if name in _resources:
+                return _resources[name]
+            with _lock_for(name):
+                if name in _resources:
+                    return _resources[name]
+                stack = getattr(_building, "stack", None)
+                if stack is None:
+                    stack = _building.stack = []
+                stack.append(0.0)
+                started = time.perf_counter()
+                try:
+                    value = factory()
+                finally:
+                    elapsed = time.perf_counter() - started
+                    nested = stack.pop()
+                    if stack:
+                        stack[-1] += elapsed
+                _timings[name] = elapsed - nested
+                _resources[name] = value
+                print(f"[INFO] Loaded {name} in {(elapsed - nested) * 1000:.1f} ms")
+                return value
+        get.resource_name = name
+        return get
+    return decorator
+
+# Record a stage that is not a resource (e.g. module imports). Only the first
+# measurement counts; later Streamlit reruns find the modules already imported.
+def record_timing(name, seconds):
+    with _registry_lock:
+        _timings.setdefault(name, seconds)
+
+def is_loaded(name):
+    return name in _resources
+
+def reset(name=None):
+    with _registry_lock:
+        for key in ([name] if name else list(_resources)):
+            _resources.pop(key, None)
+            _timings.pop(key, None)
+
+def startup_timings():
+    return dict(_timings)
+
+def format_startup_report():
+    timings = startup_timings()
+    if not timings:
+        return "No resources loaded yet."
+    width = max(len(name) for name in timings)
+    lines = [f"{name:<{width}}  {seconds * 1000:9.1f} ms" for name, seconds in timings.items()]
+    lines.append(f"{'total':<{width}}  {sum(timings.values()) * 1000:9.1f} ms")
+    return "\n".join(lines)
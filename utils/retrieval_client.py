@@ -0,0 +1,125 @@
+import os
+import json
+import time
+import socket
+import threading
+import http.client
+from urllib.parse import urlsplit
+
+# --- Client for retrieval_server.py ---
+# With RETRIEVAL_SERVER set, the apps send retrieval to one shared server
+# process instead of loading models and indexes in every UI worker:
+#   RETRIEVAL_SERVER=http://127.0.0.1:8600
+#   RETRIEVAL_SERVER=unix:///tmp/chatbot-retrieval.sock
+RETRIEVAL_SERVER = os.getenv("RETRIEVAL_SERVER", "")
+RETRIEVAL_TIMEOUT = float(os.getenv("RETRIEVAL_TIMEOUT", "30"))
+# How long a remote data hash is trusted before asking the server again
+DATA_HASH_TTL = 30.0
+
+
+def enabled():
+    return bool(RETRIEVAL_SERVER)
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path, timeout):
+        super().__init__("localhost", timeout=timeout)
+        self.unix_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.unix_path)
+
+class RetrievalClient:
+    def __init__(self, address=RETRIEVAL_SERVER, timeout=RETRIEVAL_TIMEOUT):
+        self.address = address
+        self.timeout = timeout
+        # One keep-alive connection per thread
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            if self.address.startswith("unix://"):
+                conn = _UnixHTTPConnection(self.address[len("unix://"):], self.timeout)
+            else:
+                url = urlsplit(self.address)
+                conn = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=self.timeout)
+            self._local.conn = conn
+        return conn
+
+    def request(self, method, path, payload=None):
+        body = None if payload is None else json.dumps(payload).encode("utf-8")
+        # A keep-alive connection the server has since closed fails once; the
+        # second attempt reconnects
+        for attempt in range(2):
+            conn = self._connection()
+            try:
+                conn.request(method, path, body, {"Content-Type": "application/json"})
+                response = conn.getresponse()
+                data = response.read()
+                break
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                self._local.conn = None
+                if attempt:
+                    raise
+        if response.status != 200:
+            raise RuntimeError(f"Retrieval server {path}: HTTP {response.status} {data[:200]!r}")
+        return json.loads(data)
+
+    def post(self, path, payload):
+        return self.request("POST", path, payload)
+
+    def get(self, path):
+        return self.request("GET", path)
+
+
+# Stands in for rag_engine.Retriever: search(), search_many() and data_hash
+class RemoteRetriever:
+    def __init__(self, client):
+        self.client = client
+        self._data_hash = None
+        self._hash_checked = 0.0
+
+    def _seen(self, response):
+        self._data_hash = response["data_hash"]
+        self._hash_checked = time.monotonic()
+
+    @property
+    def data_hash(self):
+        if self._data_hash is None or time.monotonic() - self._hash_checked > DATA_HASH_TTL:
+            self._seen(self.client.get("/rag_engine/info"))
+        return self._data_hash
+
+    def search(self, query, top_k=3):
+        response = self.client.post("/rag_engine/search", {"query": query, "top_k": top_k})
+        self._seen(response)
+        return response["chunks"]
+
+    def search_many(self, queries, top_k=3):
+        response = self.client.post("/rag_engine/search_many", {"queries": list(queries), "top_k": top_k})
+        self._seen(response)
+        return response["results"]
+
+
+_client = None
+_remote_retriever = None
+_client_lock = threading.Lock()
+
+def get_client():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = RetrievalClient()
+    return _client
+
+def get_remote_retriever():
+    global _remote_retriever
+    if _remote_retriever is None:
+        client = get_client()
+        with _client_lock:
+            if _remote_retriever is None:
+                _remote_retriever = RemoteRetriever(client)
+    return _remote_retriever
@@ -0,0 +1,118 @@
+import os
+import time
+import threading
+import numpy as np
+from utils.cache import register_cache
+
+# --- Semantic cache for GPT fallback replies ---
+# Exact-key caches miss every rewording of a question the model already
+# answered. This one keeps (query embedding, context, reply) and serves the
+# reply when a new query's cosine similarity to a stored one reaches the
+# threshold and both were asked against the same context (e.g. the same
+# best-matching Q&A row). A few hundred rows fit in one preallocated matrix,
+# so a lookup is a single matrix-vector product. Entries expire after ttl
+# seconds; when full, the least recently used one is replaced.
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+SEMANTIC_CACHE_SIZE = int(os.getenv("SEMANTIC_CACHE_SIZE", "512"))
+SEMANTIC_CACHE_TTL = float(os.getenv("SEMANTIC_CACHE_TTL", "3600"))
+
+
+def _unit(vector):
+    vector = np.asarray(vector, dtype="float32").reshape(-1)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+class SemanticCache:
+    def __init__(self, threshold=SEMANTIC_CACHE_THRESHOLD, maxsize=SEMANTIC_CACHE_SIZE, ttl=SEMANTIC_CACHE_TTL):
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        # LLM time the hits saved, from the latency recorded with each reply
+        self.saved_seconds = 0.0
+        self._vectors = None  # (maxsize, dim), allocated on the first set()
+        self._expires = np.zeros(maxsize)  # 0 marks a free slot
+        self._used = np.zeros(maxsize, dtype="int64")
+        self._contexts = np.zeros(maxsize, dtype="int64")
+        self._entries = [None] * maxsize  # (context, reply, latency)
+        self._clock = 0
+        self._lock = threading.Lock()
+
+    # Best live slot for this query and context, and its similarity
+    def _best(self, vector, context, now):
+        if self._vectors is None or len(vector) != self._vectors.shape[1]:
+            return None, 0.0
+        live = (self._expires > now) & (self._contexts == hash(context))
+        if not live.any():
+            return None, 0.0
+        scores = np.where(live, self._vectors @ vector, -np.inf)
+        slot = int(np.argmax(scores))
+        if self._entries[slot][0] != context:
+            return None, 0.0
+        return slot, float(scores[slot])
+
+    def get(self, vector, context=None):
+        vector = _unit(vector)
+        with self._lock:
+            slot, score = self._best(vector, context, time.monotonic())
+            if slot is None or score < self.threshold:
+                self.misses += 1
+                return None
+            self._clock += 1
+            self._used[slot] = self._clock
+            self.hits += 1
+            _, reply, latency = self._entries[slot]
+            self.saved_seconds += latency
+            return reply
+
+    # latency: seconds the LLM took for this reply, credited on every hit
+    def set(self, vector, reply, context=None, latency=0.0):
+        vector = _unit(vector)
+        with self._lock:
+            now = time.monotonic()
+            if self._vectors is None or len(vector) != self._vectors.shape[1]:
+                self._reset(len(vector))
+            slot, score = self._best(vector, context, now)
+            if slot is None or score < self.threshold:
+                # A free or expired slot, else the least recently used one
+                free = np.flatnonzero(self._expires <= now)
+                slot = int(free[0]) if len(free) else int(np.argmin(self._used))
+            self._clock += 1
+            self._vectors[slot] = vector
+            self._expires[slot] = now + self.ttl
+            self._used[slot] = self._clock
+            self._contexts[slot] = hash(context)
+            self._entries[slot] = (context, reply, latency)
+
+    def _reset(self, dim=None):
+        if dim is not None:
+            self._vectors = np.zeros((self.maxsize, dim), dtype="float32")
+        self._expires[:] = 0
+        self._entries = [None] * self.maxsize
+
+    def clear(self):
+        with self._lock:
+            self._reset()
+
+    def __len__(self):
+        return int((self._expires > time.monotonic()).sum())
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "threshold": self.threshold,
+            # every hit is one LLM call that was not made
+            "avoided_calls": self.hits,
+            "saved_seconds": self.saved_seconds,
+        }
+
+
+# One per app, listed with the other caches in cache_stats() / metrics
+def get_semantic_cache(name, **kwargs):
+    return register_cache(name, lambda: SemanticCache(**kwargs))
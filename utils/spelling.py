@@ -0,0 +1,270 @@
+import os
+import re
+import sys
+import json
+import time
+import gc
+import hashlib
+import threading
+from functools import lru_cache
+from importlib.metadata import version, PackageNotFoundError
+from symspellpy import SymSpell, Verbosity
+from utils.cache import get_cache
+from utils.lexicon import ABBREVIATIONS, SYNONYMS, CHAT_ABBREVIATIONS, DEPARTMENT_MAP, COURSE_CODE_RE
+
+DATA_PATH = "data/university_data.json"
+WORD_CACHE_SIZE = 50000
+SNAPSHOT_DIR = os.getenv("SYMSPELL_SNAPSHOT_DIR", "symspell_snapshots")
+SNAPSHOT_MAGIC = b"SYMSPELL-SNAPSHOT\n"
+SNAPSHOT_FORMAT = 1
+
+TOKEN_RE = re.compile(r"[A-Za-z0-9]+(?:[-.][A-Za-z0-9]+)*\.?")
+# Tokens with digits (CSC201, 2nd, 100) are never dictionary words
+HAS_DIGIT_RE = re.compile(r"\d")
+
+
+def _symspellpy_version():
+    try:
+        return version("symspellpy")
+    except PackageNotFoundError:
+        return "unknown"
+
+def _sha256_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# --- SymSpell snapshots ---
+# Loading the frequency dictionary means generating every delete variant,
+# which takes seconds. A snapshot stores the prepared tables as a pickle
+# behind a small JSON header (format, source dictionary hash, parameters,
+# symspellpy version, payload hash). A snapshot whose header or checksum does
+# not match is ignored and rebuilt. The file name carries a prefix of the
+# source hash: rags loads symspellpy's bundled dictionary and
+# university_chatbot the repo copy (same name, different bytes), and each
+# needs a snapshot of its own.
+def snapshot_path(dictionary_path, source_sha, max_edit_distance, prefix_length, snapshot_dir=SNAPSHOT_DIR):
+    stem = os.path.splitext(os.path.basename(str(dictionary_path)))[0]
+    return os.path.join(snapshot_dir, f"{stem}-{source_sha[:12]}-ed{max_edit_distance}-p{prefix_length}.snapshot")
+
+def _snapshot_header(source_sha, max_edit_distance, prefix_length):
+    return {
+        "format": SNAPSHOT_FORMAT,
+        "source_sha256": source_sha,
+        "max_edit_distance": max_edit_distance,
+        "prefix_length": prefix_length,
+        "symspellpy": _symspellpy_version(),
+    }
+
+def write_snapshot(sym_spell, path, header):
+    payload = sym_spell.save_pickle(compressed=False, to_bytes=True)
+    header = dict(header, payload_sha256=hashlib.sha256(payload).hexdigest())
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_file = path + ".tmp"
+    with open(tmp_file, "wb") as f:
+        f.write(SNAPSHOT_MAGIC)
+        f.write(json.dumps(header).encode("utf-8") + b"\n")
+        f.write(payload)
+    os.replace(tmp_file, path)
+
+def read_snapshot(path, expected_header):
+    with open(path, "rb") as f:
+        if f.readline() != SNAPSHOT_MAGIC:
+            raise ValueError("not a SymSpell snapshot")
+        header = json.loads(f.readline())
+        payload = f.read()
+    for key, value in expected_header.items():
+        if header.get(key) != value:
+            raise ValueError(f"snapshot {key} mismatch")
+    if hashlib.sha256(payload).hexdigest() != header.get("payload_sha256"):
+        raise ValueError("snapshot checksum mismatch")
+    sym_spell = SymSpell(max_dictionary_edit_distance=expected_header["max_edit_distance"],
+                         prefix_length=expected_header["prefix_length"])
+    # Unpickling millions of small containers; the cyclic GC only slows it down
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        loaded = sym_spell.load_pickle(payload, compressed=False, from_bytes=True)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    if not loaded:
+        raise ValueError("snapshot payload rejected by symspellpy")
+    return sym_spell
+
+# Load a SymSpell for dictionary_path, from its snapshot when one is valid,
+# otherwise from the text dictionary (writing a snapshot for next time).
+def load_sym_spell(dictionary_path, max_edit_distance=2, prefix_length=7,
+                   snapshot_dir=SNAPSHOT_DIR, write=True):
+    started = time.perf_counter()
+    source_sha = _sha256_file(dictionary_path)
+    header = _snapshot_header(source_sha, max_edit_distance, prefix_length)
+    path = snapshot_path(dictionary_path, source_sha, max_edit_distance, prefix_length, snapshot_dir)
+    if os.path.exists(path):
+        try:
+            sym_spell = read_snapshot(path, header)
+            print(f"[INFO] Loaded SymSpell snapshot {path} in {time.perf_counter() - started:.2f}s")
+            return sym_spell
+        except (OSError, ValueError, EOFError) as e:
+            print(f"[WARN] Ignoring SymSpell snapshot {path}: {e}")
+
+    sym_spell = SymSpell(max_dictionary_edit_distance=max_edit_distance, prefix_length=prefix_length)
+    sym_spell.load_dictionary(dictionary_path, term_index=0, count_index=1)
+    print(f"[INFO] Loaded SymSpell dictionary {dictionary_path} in {time.perf_counter() - started:.2f}s")
+    if write:
+        try:
+            write_snapshot(sym_spell, path, header)
+        except OSError as e:
+            print(f"[WARN] Could not write SymSpell snapshot {path}: {e}")
+    return sym_spell
+
+
+# Words the spell checker must leave alone: course codes and their prefixes,
+# department/faculty names, and the keys of the lookup tables.
+@lru_cache(maxsize=4)
+def build_domain_vocabulary(path=DATA_PATH):
+    vocab = set()
+
+    def add_words(text):
+        vocab.update(t.lower() for t in TOKEN_RE.findall(text or ""))
+
+    for table in (ABBREVIATIONS, SYNONYMS, CHAT_ABBREVIATIONS, DEPARTMENT_MAP):
+        for key in table:
+            add_words(key)
+    for name in DEPARTMENT_MAP.values():
+        add_words(name)
+
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            entries = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"[WARN] Could not read {path} for the spelling vocabulary: {e}")
+        entries = []
+    for entry in entries:
+        add_words(entry.get("department", ""))
+        add_words(entry.get("faculty", ""))
+        for text in (entry.get("question", ""), entry.get("answer", "")):
+            for prefix, number in COURSE_CODE_RE.findall(text):
+                vocab.update((prefix.lower(), f"{prefix}{number}".lower()))
+    return frozenset(vocab)
+
+
+# --- Domain-aware spell correction ---
+# Wraps a loaded SymSpell. Known domain tokens are passed through untouched,
+# everything else is corrected once and memoized in a process-wide LRU.
+# Cumulative timing is kept so the per-query cost shows up in stats().
+class SpellCorrector:
+    def __init__(self, sym_spell, vocabulary, name="spelling", max_edit_distance=2):
+        self.sym_spell = sym_spell
+        self.vocabulary = vocabulary
+        self.max_edit_distance = max_edit_distance
+        self.word_cache = get_cache(f"{name}.words", maxsize=WORD_CACHE_SIZE, ttl=float("inf"))
+        self.phrase_cache = get_cache(f"{name}.phrases", maxsize=WORD_CACHE_SIZE, ttl=float("inf"))
+        self.calls = 0
+        self.skipped = 0
+        self.total_seconds = 0.0
+        self.last_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def is_known(self, token):
+        return token.lower() in self.vocabulary or HAS_DIGIT_RE.search(token) is not None
+
+    def _record(self, started, skipped):
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.calls += 1
+            self.skipped += skipped
+            self.total_seconds += elapsed
+            self.last_seconds = elapsed
+
+    def correct_word(self, word):
+        def lookup():
+            suggestions = self.sym_spell.lookup(word, Verbosity.CLOSEST,
+                                                max_edit_distance=self.max_edit_distance)
+            return suggestions[0].term if suggestions else word
+
+        return self.word_cache.get_or_set(word, lookup)
+
+    # Word-by-word correction (rags.preprocess_text)
+    def correct_words(self, words):
+        started = time.perf_counter()
+        corrected, skipped = [], 0
+        for word in words:
+            if self.is_known(word):
+                corrected.append(word)
+                skipped += 1
+            else:
+                corrected.append(self.correct_word(word))
+        self._record(started, skipped)
+        return corrected
+
+    # Compound correction (university_chatbot). Domain tokens split the input
+    # into runs; each run of ordinary words goes through lookup_compound on
+    # its own and the domain tokens are put back verbatim.
+    def correct_compound(self, text):
+        started = time.perf_counter()
+        parts, run, skipped = [], [], 0
+
+        def flush_run():
+            if run:
+                phrase = " ".join(run)
+                parts.append(self.phrase_cache.get_or_set(phrase, lambda: self._compound(phrase)))
+                run.clear()
+
+        for token in text.split():
+            if self.is_known(token.strip("?!,;:")):
+                flush_run()
+                parts.append(token)
+                skipped += 1
+            else:
+                run.append(token)
+        flush_run()
+        self._record(started, skipped)
+        return " ".join(parts)
+
+    def _compound(self, phrase):
+        suggestions = self.sym_spell.lookup_compound(phrase, max_edit_distance=self.max_edit_distance)
+        return suggestions[0].term if suggestions else phrase
+
+    def stats(self):
+        with self._lock:
+            calls = self.calls
+            return {
+                "calls": calls,
+                "skipped_tokens": self.skipped,
+                "total_ms": self.total_seconds * 1000,
+                "avg_ms": self.total_seconds * 1000 / calls if calls else 0.0,
+                "last_ms": self.last_seconds * 1000,
+                "word_cache": self.word_cache.stats(),
+                "phrase_cache": self.phrase_cache.stats(),
+            }
+
+
+# Dictionaries the apps load: the repo copy (university_chatbot) and the one
+# bundled with symspellpy (rags)
+def default_dictionaries():
+    paths = ["frequency_dictionary_en_82_765.txt"]
+    try:
+        import pkg_resources
+        paths.append(pkg_resources.resource_filename("symspellpy", "frequency_dictionary_en_82_765.txt"))
+    except ImportError:
+        pass
+    return [path for path in paths if os.path.exists(path)]
+
+# Build step: python -m utils.spelling [dictionary ...]
+def main(paths):
+    for path in paths or default_dictionaries():
+        sym_spell = SymSpell(max_dictionary_edit_distance=2, prefix_length=7)
+        started = time.perf_counter()
+        sym_spell.load_dictionary(path, term_index=0, count_index=1)
+        source_sha = _sha256_file(path)
+        out = snapshot_path(path, source_sha, 2, 7)
+        write_snapshot(sym_spell, out, _snapshot_header(source_sha, 2, 7))
+        print(f"[INFO] Built {out} from {path} in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
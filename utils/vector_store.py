@@ -0,0 +1,120 @@
+import os
+import json
+import struct
+import hashlib
+import numpy as np
+
+STORE_DIR = os.getenv("EMBEDDING_STORE_DIR", "embedding_store")
+# float32, float16 (half the size, ~1e-4 cosine error) or int8 (a quarter,
+# per-row scale, ~1e-3 cosine error); see benchmarks/quantized_storage.py
+STORE_FORMAT = os.getenv("EMBEDDING_STORE_FORMAT", "float16")
+FORMATS = ("float32", "float16", "int8")
+MAGIC = b"VSTORE1\n"
+ALIGN = 64
+# Rows are upcast to float32 this many bytes at a time while scoring
+BLOCK_BYTES = 4 << 20
+
+
+def content_key(texts):
+    digest = hashlib.sha256()
+    for text in texts:
+        digest.update(text.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+def _aligned(offset):
+    return -(-offset // ALIGN) * ALIGN
+
+
+# --- Compact embedding matrix on disk ---
+# One file: magic, JSON header, then the rows (and per-row int8 scales).
+# Readers memory-map it read-only, so every process serving the same file
+# shares one copy in the page cache instead of holding its own.
+def write_store(path, matrix, fmt=STORE_FORMAT, key=""):
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown store format {fmt!r}, expected one of {FORMATS}")
+    matrix = np.asarray(matrix, dtype="float32")
+    rows, dim = matrix.shape
+    scales = None
+    if fmt == "int8":
+        scales = np.abs(matrix).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        data = np.round(matrix / scales[:, None]).astype("int8")
+        scales = scales.astype("float32")
+    else:
+        data = matrix.astype(fmt)
+
+    header = {"format": fmt, "rows": rows, "dim": dim, "key": key}
+    header_bytes = json.dumps(header).encode("utf-8")
+    data_offset = _aligned(len(MAGIC) + 4 + len(header_bytes))
+    scales_offset = _aligned(data_offset + data.nbytes)
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC + struct.pack("<I", len(header_bytes)) + header_bytes)
+        f.seek(data_offset)
+        f.write(data.tobytes())
+        if scales is not None:
+            f.seek(scales_offset)
+            f.write(scales.tobytes())
+    os.replace(tmp_path, path)
+
+class VectorStore:
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a vector store")
+            (length,) = struct.unpack("<I", f.read(4))
+            header = json.loads(f.read(length))
+        self.format = header["format"]
+        self.key = header["key"]
+        rows, dim = header["rows"], header["dim"]
+        self.shape = (rows, dim)
+        data_offset = _aligned(len(MAGIC) + 4 + length)
+        self.data = np.memmap(path, dtype=self.format, mode="r", offset=data_offset, shape=self.shape)
+        self.scales = None
+        if self.format == "int8":
+            scales_offset = _aligned(data_offset + self.data.nbytes)
+            self.scales = np.memmap(path, dtype="float32", mode="r", offset=scales_offset, shape=(rows,))
+        self.block_rows = max(1, BLOCK_BYTES // (4 * dim))
+
+    def __len__(self):
+        return self.shape[0]
+
+    def rows(self, rows):
+        block = np.asarray(self.data[rows], dtype="float32")
+        if self.scales is not None:
+            block *= self.scales[rows][:, None]
+        return block
+
+    # query @ rows^T without upcasting the whole matrix at once
+    def scores(self, query, rows=None):
+        query = np.asarray(query, dtype="float32").reshape(-1)
+        count = len(self) if rows is None else len(rows)
+        out = np.empty(count, dtype="float32")
+        for start in range(0, count, self.block_rows):
+            stop = min(start + self.block_rows, count)
+            chunk = slice(start, stop) if rows is None else np.asarray(rows[start:stop])
+            out[start:stop] = self.rows(chunk) @ query
+        return out
+
+def store_path(name, fmt=STORE_FORMAT, store_dir=STORE_DIR):
+    safe_name = "".join(c if c.isalnum() or c in "-_." else "_" for c in name)
+    return os.path.join(store_dir, f"{safe_name}.{fmt}.vec")
+
+# Open the store for these texts, (re)building it with build_fn() -> float32
+# matrix when it is missing or was built from different texts
+def open_store(name, texts, build_fn, fmt=STORE_FORMAT):
+    path = store_path(name, fmt)
+    key = content_key(texts)
+    try:
+        store = VectorStore(path)
+        if store.key == key and len(store) == len(texts):
+            return store
+    except (OSError, ValueError, KeyError):
+        pass
+    print(f"[INFO] Writing {fmt} embedding store {path}")
+    write_store(path, build_fn(), fmt, key)
+    return VectorStore(path)